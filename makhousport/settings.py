@@ -51,11 +51,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'shop.middleware.MetricsMiddleware',
+    'shop.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'shop.middleware.PrimaryDatabaseMiddleware',
+    'shop.middleware.CartMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,7 +68,8 @@ ROOT_URLCONF = 'makhousport.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Moteur Django, rendu chronométré pour les métriques (shop.metrics).
+        'BACKEND': 'shop.backends.templates.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -92,6 +97,67 @@ DATABASES = {
     }
 }
 
+# Connexion de chaque alias surchargeable par l'environnement: DJANGO_DB_<CLÉ> pour le primaire,
+# DJANGO_DB_REPLICA_<CLÉ> pour le réplica (ex. un second fichier SQLite ou un Postgres local).
+DATABASE_ENV_KEYS = ('ENGINE', 'NAME', 'HOST', 'PORT', 'USER', 'PASSWORD')
+
+for _key in DATABASE_ENV_KEYS:
+    if os.environ.get(f"DJANGO_DB_{_key}"):
+        DATABASES['default'][_key] = os.environ[f"DJANGO_DB_{_key}"]
+
+# Profil SQLite de production (SHOP_SQLITE_PRODUCTION=1): WAL et pragmas appliqués à chaque
+# connexion, connexions persistantes, BEGIN IMMEDIATE pour les écritures du checkout.
+if os.environ.get("SHOP_SQLITE_PRODUCTION", "0") == "1":
+    DATABASES['default'].update({
+        'ENGINE': 'shop.backends.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get("SHOP_SQLITE_CONN_MAX_AGE", "600")),
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'busy_timeout': int(os.environ.get("SHOP_SQLITE_BUSY_TIMEOUT", "5000")),
+                'synchronous': 'NORMAL',
+                'mmap_size': 128 * 1024 * 1024,
+                # Négatif: en Kio (64 Mio).
+                'cache_size': -64 * 1024,
+                'temp_store': 'MEMORY',
+            },
+        },
+    })
+
+# Réplica en lecture (DJANGO_DB_REPLICA_NAME): les lectures du catalogue y vont, les écritures et
+# les lectures qui doivent voir ses propres écritures (checkout, confirmation, admin) restent sur le
+# primaire (shop.routers). Sans réplica, tout va au primaire.
+if os.environ.get("DJANGO_DB_REPLICA_NAME"):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        # Les tests lisent la base de test du primaire.
+        'TEST': {'MIRROR': 'default'},
+    }
+    for _key in DATABASE_ENV_KEYS:
+        if os.environ.get(f"DJANGO_DB_REPLICA_{_key}"):
+            DATABASES['replica'][_key] = os.environ[f"DJANGO_DB_REPLICA_{_key}"]
+
+# Retard maximal attendu du réplica (secondes): le catalogue change encore de version une fois ce
+# délai passé (message de l'outbox, voir process_outbox).
+SHOP_REPLICA_LAG = int(os.environ.get("SHOP_REPLICA_LAG", "5"))
+
+DATABASE_ROUTERS = ['shop.routers.PrimaryReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Le cache du catalogue est versionné: en production avec plusieurs processus, utiliser un
+# cache partagé (Redis, Memcached) pour que les modifications admin soient vues partout.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            "DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        'LOCATION': os.environ.get("DJANGO_CACHE_LOCATION", "makhousport"),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -132,10 +198,95 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Hors DEBUG, collectstatic écrit des noms hashés et leurs variantes .gz (et .br si le paquet brotli
+# est installé); les templates référencent alors les noms hashés, cachés un an.
+SHOP_STATIC_MANIFEST = os.environ.get("SHOP_STATIC_MANIFEST", "0" if DEBUG else "1") == "1"
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': (
+            'shop.storage.CompressedManifestStaticFilesStorage'
+            if SHOP_STATIC_MANIFEST
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+# STATIC_URL servi par Django depuis STATIC_ROOT (pas de proxy devant), variantes précompressées comprises.
+SHOP_SERVE_STATIC = os.environ.get("SHOP_SERVE_STATIC", "0") == "1"
+SHOP_STATIC_MAX_AGE = int(os.environ.get("SHOP_STATIC_MAX_AGE", "3600"))
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Médias servis par Django hors DEBUG (pas de proxy devant): ETag, plages d'octets, sendfile.
+SHOP_SERVE_MEDIA = os.environ.get("SHOP_SERVE_MEDIA", "0") == "1"
+# Cache navigateur des médias sans hash dans le nom (secondes); revalidés ensuite par ETag.
+SHOP_MEDIA_MAX_AGE = int(os.environ.get("SHOP_MEDIA_MAX_AGE", "3600"))
+
+# Email
+# https://docs.djangoproject.com/en/4.2/topics/email/
+# Console par défaut: les e-mails envoyés par process_outbox s'affichent dans le terminal.
+
+EMAIL_BACKEND = os.environ.get("DJANGO_EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
+DEFAULT_FROM_EMAIL = os.environ.get("DJANGO_DEFAULT_FROM_EMAIL", "Makhou Sport <contact@makhousport.sn>")
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Boutique
+
+# Pagination par curseur (?after= / ?before=) au lieu de ?page= pour les tris de la boutique.
+SHOP_CURSOR_PAGINATION = os.environ.get("SHOP_CURSOR_PAGINATION", "0") == "1"
+
+# Total affiché en mode curseur (compté avec les facettes, sans requête de plus).
+SHOP_CURSOR_SHOW_TOTAL = os.environ.get("SHOP_CURSOR_SHOW_TOTAL", "1") == "1"
+
+# Comptes des facettes (prix, disponibilité, catégorie): durée de cache (secondes) par recherche,
+# en plus de l'invalidation à chaque changement du catalogue.
+SHOP_FACET_CACHE_TIMEOUT = int(os.environ.get("SHOP_FACET_CACHE_TIMEOUT", "300"))
+
+# Réservation du stock d'un panier pendant le checkout (secondes).
+SHOP_RESERVATION_TTL = int(os.environ.get("SHOP_RESERVATION_TTL", "900"))
+SHOP_RESERVATION_SWEEP_INTERVAL = 60
+
+# Stockage du panier: cookie signé (aucune écriture en base), cache ou session Django.
+SHOP_CART_STORAGE = os.environ.get("SHOP_CART_STORAGE", "shop.cart.SignedCookieCartStorage")
+SHOP_CART_COOKIE_NAME = "cart"
+SHOP_CART_MAX_AGE = 60 * 60 * 24 * 30
+
+# Part des requêtes instrumentées (requêtes SQL, latence, rendu); exposées sur /interne/metriques/.
+SHOP_METRICS_SAMPLE_RATE = float(os.environ.get("SHOP_METRICS_SAMPLE_RATE", "0.1"))
+
+# Pages catalogue (accueil, liste, fiche) servies par les vues asynchrones: à activer sous ASGI.
+SHOP_ASYNC_VIEWS = os.environ.get("SHOP_ASYNC_VIEWS", "0") == "1"
+
+# Écritures du checkout: tentatives si la base est verrouillée, attente initiale (secondes) doublée à chaque fois.
+SHOP_WRITE_ATTEMPTS = 3
+SHOP_WRITE_RETRY_BACKOFF = 0.05
+
+# Messages sortants (manage.py process_outbox): bail d'un lot (secondes), tentatives, attente initiale
+# doublée à chaque échec (secondes) et plafond.
+SHOP_OUTBOX_LEASE = 300
+SHOP_OUTBOX_MAX_ATTEMPTS = 8
+SHOP_OUTBOX_RETRY_BACKOFF = 30
+SHOP_OUTBOX_RETRY_MAX_DELAY = 3600
+
+# Destinataires des notifications de commande et des alertes de stock (séparés par des virgules).
+SHOP_STAFF_EMAILS = [
+    email.strip() for email in os.environ.get("SHOP_STAFF_EMAILS", "").split(",") if email.strip()
+]
+SHOP_LOW_STOCK_THRESHOLD = int(os.environ.get("SHOP_LOW_STOCK_THRESHOLD", "3"))
+
+# Compression des réponses (HTML, JSON, CSV, y compris en flux): codages par ordre de préférence
+# (br et zstd seulement si les paquets brotli / zstandard sont installés), niveaux, taille minimale.
+SHOP_COMPRESSION = os.environ.get("SHOP_COMPRESSION", "1") == "1"
+SHOP_COMPRESSION_ENCODINGS = ("br", "zstd", "gzip")
+SHOP_COMPRESSION_LEVELS = {
+    "br": int(os.environ.get("SHOP_COMPRESSION_BR_LEVEL", "4")),
+    "zstd": int(os.environ.get("SHOP_COMPRESSION_ZSTD_LEVEL", "3")),
+    "gzip": int(os.environ.get("SHOP_COMPRESSION_GZIP_LEVEL", "6")),
+}
+SHOP_COMPRESSION_MIN_SIZE = 512
@@ -14,15 +14,28 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+from urllib.parse import urlsplit
+
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from shop.media import serve_media, serve_static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('shop.urls')),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Médias servis par Django en développement, ou en production sans proxy (SHOP_SERVE_MEDIA).
+if (settings.DEBUG or getattr(settings, "SHOP_SERVE_MEDIA", False)) and not urlsplit(settings.MEDIA_URL).netloc:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+    ]
+
+# Fichiers de collectstatic servis par Django (SHOP_SERVE_STATIC), avec leurs variantes .br/.gz.
+if getattr(settings, "SHOP_SERVE_STATIC", False) and not urlsplit(settings.STATIC_URL).netloc:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), serve_static, name='static'),
+    ]
@@ -1,7 +1,17 @@
+import re
+
 from django.contrib import admin
+from django.db.models import Q, Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.utils.html import format_html
 
-from .models import Category, Order, OrderItem, Product, ProductImage
+from . import exports
+from .models import Category, DailySales, Order, OrderItem, OutboxMessage, Product, ProductImage, normalize_phone
+
+
+PHONE_LIKE = re.compile(r"^\+?[\d\s().-]+$")
+MIN_PHONE_DIGITS = 7
 
 
 def format_xof(value: int) -> str:
@@ -74,12 +84,102 @@ class OrderAdmin(admin.ModelAdmin):
     search_fields = ("id", "customer_name", "customer_phone", "customer_email")
     inlines = [OrderItemInline]
     readonly_fields = ("created_at",)
+    actions = ("export_csv", "export_jsonl")
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        by_pk = Q(pk=int(term)) if term.isdigit() and len(term) <= 18 else Q()
+        if PHONE_LIKE.match(term) and len(re.sub(r"\D", "", term)) >= MIN_PHONE_DIGITS:
+            # Téléphone complet: recherche exacte sur index, sans balayage icontains.
+            matches = queryset.filter(Q(customer_phone_normalized=normalize_phone(term)) | by_pk)
+            if matches.exists():
+                return matches, False
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if by_pk:
+            # « 77 » est un numéro de commande ou un bout de téléphone: les deux sont affichés.
+            results |= queryset.filter(by_pk)
+        return results, may_have_duplicates
 
     def total_display(self, obj: Order) -> str:
         return format_xof(obj.total_xof)
 
     total_display.short_description = "Total"
 
+    @admin.action(description="Exporter en CSV (avec les lignes)")
+    def export_csv(self, request, queryset):
+        return self.export(queryset, "csv")
+
+    @admin.action(description="Exporter en JSONL (avec les lignes)")
+    def export_jsonl(self, request, queryset):
+        return self.export(queryset, "jsonl")
+
+    def export(self, queryset, fmt: str) -> StreamingHttpResponse:
+        content_type, extension = exports.FORMATS[fmt]
+        response = StreamingHttpResponse(exports.export_lines(queryset, fmt), content_type=content_type)
+        filename = f"commandes-{timezone.localdate():%Y%m%d}.{extension}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(admin.ModelAdmin):
+    """Tableau de bord des ventes: ne lit que les rollups, jamais les commandes."""
+
+    list_display = ("day", "category", "product", "payment_method", "units", "revenue_display", "order_count")
+    list_filter = ("day", "category", "payment_method")
+    list_select_related = ("product", "category")
+    date_hierarchy = "day"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def revenue_display(self, obj: DailySales) -> str:
+        return format_xof(obj.revenue_xof)
+
+    revenue_display.short_description = "Chiffre d'affaires"
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        changelist = getattr(response, "context_data", {}).get("cl")
+        if changelist is None:
+            return response
+
+        rollups = changelist.queryset.order_by()
+        totals = {"units": Sum("units"), "revenue": Sum("revenue_xof"), "orders": Sum("order_count")}
+        by_category = rollups.values("category__name").annotate(**totals).order_by("-revenue")
+        by_payment = rollups.values("payment_method").annotate(**totals).order_by("-revenue")
+        labels = dict(Order.PaymentMethod.choices)
+        response.context_data["sales_summary"] = {
+            "total": rollups.aggregate(**totals),
+            "by_category": [{**row, "label": row["category__name"] or "Catégorie supprimée"} for row in by_category],
+            "by_payment": [{**row, "label": labels.get(row["payment_method"], row["payment_method"])} for row in by_payment],
+        }
+        return response
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "topic", "status", "attempts", "available_at", "created_at", "processed_at")
+    list_filter = ("status", "topic")
+    readonly_fields = ("topic", "payload", "attempts", "last_error", "created_at", "processed_at")
+    actions = ("retry",)
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Réessayer maintenant")
+    def retry(self, request, queryset):
+        count = queryset.exclude(status=OutboxMessage.Status.DONE).update(
+            status=OutboxMessage.Status.PENDING, available_at=timezone.now(), locked_until=None, lock_token=""
+        )
+        self.message_user(request, f"{count} message(s) replanifié(s).")
+
 
 admin.site.site_header = "Makhou Sport — Administration"
 admin.site.site_title = "Makhou Sport"
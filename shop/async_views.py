@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import Page, Paginator
+from django.db import connections
+from django.http import Http404, HttpRequest, HttpResponse
+from django.shortcuts import render
+
+from . import catalog, facets
+from .conditional import async_catalog_page
+from .models import Product
+from .pagination import alist
+from .views import PAGE_SIZE, Listing
+
+# Vues catalogue pour ASGI (SHOP_ASYNC_VIEWS). En Django 4.2, l'ORM asynchrone passe par le thread
+# unique de ``sync_to_async(thread_sensitive=True)``: deux requêtes « async » s'y suivent. Une requête
+# indépendante (facettes, catégories) part donc dans un thread du pool, avec sa propre connexion,
+# pendant que les lignes de la page sont lues sur la connexion de la requête.
+
+_render = sync_to_async(render)
+
+
+async def _in_thread(func, *args):
+    """``func(*args)`` dans un thread du pool, en parallèle du thread de la requête."""
+
+    def run():
+        try:
+            return func(*args)
+        finally:
+            # Connexion propre à ce thread (ouverte seulement si ``func`` a interrogé la base).
+            connections.close_all()
+
+    return await sync_to_async(run, thread_sensitive=False)()
+
+
+async def _offset_page(products, number, facet_counts) -> tuple[Page, facets.Facets]:
+    """``facet_counts``: awaitable des facettes, qui donnent aussi le nombre total de produits."""
+    paginator = Paginator(products, PAGE_SIZE)
+    try:
+        requested = max(1, int(number))
+    except (TypeError, ValueError):
+        requested = 1
+
+    # La page demandée est lue pendant le calcul des comptes; relue seulement si elle était hors limites.
+    bottom = (requested - 1) * PAGE_SIZE
+    counts, rows = await asyncio.gather(facet_counts, alist(products[bottom : bottom + PAGE_SIZE]))
+    paginator.count = counts.total
+    page = paginator.get_page(requested)
+    if page.number != requested:
+        rows = await alist(page.object_list)
+    page.object_list = rows
+    return page, counts
+
+
+@async_catalog_page
+async def home(request: HttpRequest) -> HttpResponse:
+    featured_products, categories = await asyncio.gather(
+        alist(Product.objects.filter(is_active=True).select_related("category", "primary_image")[:8]),
+        _in_thread(catalog.active_categories),
+    )
+    return await _render(
+        request,
+        "shop/home.html",
+        {
+            "featured_products": featured_products,
+            "categories": categories[:8],
+        },
+    )
+
+
+@async_catalog_page
+async def product_list(request: HttpRequest, category_slug: str | None = None) -> HttpResponse:
+    category = None
+    if category_slug:
+        category = await catalog.acategory_by_slug(category_slug)
+        if category is None:
+            raise Http404("Catégorie introuvable.")
+
+    listing = Listing.from_request(request)
+    products = listing.products(category)
+    # Facettes (et total) dans un autre thread pendant la lecture des lignes de la page.
+    counts = _in_thread(listing.facet_counts, category)
+    if listing.use_cursor:
+        page_obj, facet_counts = await asyncio.gather(
+            listing.cursor_paginator(products).aget_page(after=listing.after, before=listing.before), counts
+        )
+        page_obj.total = listing.cursor_total(facet_counts)
+    else:
+        page_obj, facet_counts = await _offset_page(
+            listing.ordered(products), request.GET.get("page"), counts
+        )
+
+    return await _render(request, "shop/product_list.html", listing.context(category, page_obj, facet_counts))
+
+
+@async_catalog_page
+async def product_detail(request: HttpRequest, slug: str) -> HttpResponse:
+    try:
+        product = await (
+            Product.objects.filter(is_active=True)
+            .prefetch_related("images")
+            .select_related("category")
+            .aget(slug=slug)
+        )
+    except Product.DoesNotExist:
+        raise Http404("Produit introuvable.") from None
+
+    return await _render(request, "shop/product_detail.html", {"product": product})
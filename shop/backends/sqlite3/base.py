@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMA_NAME = re.compile(r"^[a-z_]+$")
+PRAGMA_VALUE = re.compile(r"^-?\w+$")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite de production: pragmas (``OPTIONS["pragmas"]``) à chaque connexion et ``BEGIN IMMEDIATE`` à la demande.
+
+    Voir ``shop.db.write_transaction``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pragmas: dict[str, object] = {}
+        # Lu au BEGIN de la prochaine transaction: prend le verrou d'écriture dès le début.
+        self.begin_immediate = False
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        pragmas = params.pop("pragmas", {})
+        for name, value in pragmas.items():
+            if not PRAGMA_NAME.match(name) or not PRAGMA_VALUE.match(str(value)):
+                raise ImproperlyConfigured(f"Pragma SQLite invalide: {name} = {value!r}")
+        self.pragmas = pragmas
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE" if self.begin_immediate else "BEGIN")
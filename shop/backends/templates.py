@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+from shop import metrics
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        with metrics.template_render():
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Moteur Django dont le rendu est chronométré pour les requêtes échantillonnées (``shop.metrics``)."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
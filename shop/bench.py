@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import json
+import math
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.files.images import get_image_dimensions
+from django.db import connection
+
+from . import catalog, images, metrics, search
+from .models import Category, Order, OrderItem, Product, ProductImage, normalize_phone
+
+
+WORDS = (
+    "Chaussettes", "Short", "Maillot", "Chevillère", "Sangle", "Manchon",
+    "Legging", "Brassière", "Genouillère", "Gourde", "Survêtement", "Casquette",
+)
+COLORS = ("noir", "blanc", "rouge", "bleu", "vert", "gris", "rose", "orange", "turquoise")
+CITIES = ("Dakar", "Thiès", "Saint-Louis", "Rufisque", "Mbour", "Ziguinchor")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+@contextmanager
+def isolated_database(name: str | None = None):
+    """Base de test jetable (comme ``manage.py test``), détruite à la sortie."""
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    previous_name = test_settings.get("NAME")
+    if name:
+        test_settings["NAME"] = name
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings["NAME"] = previous_name
+
+
+def generate_catalog(
+    products: int, orders: int, categories: int = 12, batch_size: int = 5000, seed: int = 42
+) -> dict[str, int]:
+    """Catalogue et historique de commandes synthétiques, insérés par ``bulk_create``."""
+    rng = random.Random(seed)
+    # Les images de démo sont partagées entre produits; dimensions lues une seule fois par fichier.
+    image_sizes = {
+        f"products/{path.name}": get_image_dimensions(path)
+        for path in sorted((Path(settings.MEDIA_ROOT) / "products").glob("*.jpeg"))
+    }
+    image_names = list(image_sizes)
+
+    category_objs = Category.objects.bulk_create(
+        [
+            Category(name=f"{WORDS[i % len(WORDS)]} {i}", slug=f"bench-categorie-{i}", description="Synthétique")
+            for i in range(categories)
+        ]
+    )
+    category_ids = [category.pk for category in category_objs]
+
+    for start in range(0, products, batch_size):
+        batch = []
+        for i in range(start, min(products, start + batch_size)):
+            word = WORDS[rng.randrange(len(WORDS))]
+            color = COLORS[rng.randrange(len(COLORS))]
+            batch.append(
+                Product(
+                    category_id=category_ids[i % len(category_ids)],
+                    name=f"{word} {color} #{i}",
+                    slug=f"bench-produit-{i}",
+                    description=f"{word} de sport {color}, modèle synthétique {i}.",
+                    price_xof=rng.randrange(1000, 50000, 500),
+                    stock=rng.randrange(0, 10_000),
+                )
+            )
+        created = Product.objects.bulk_create(batch)
+        if image_names:
+            product_images = []
+            for product in created:
+                name = image_names[product.pk % len(image_names)]
+                width, height = image_sizes[name]
+                product_images.append(ProductImage(product_id=product.pk, image=name, width=width, height=height))
+            ProductImage.objects.bulk_create(product_images)
+
+    product_rows = list(Product.objects.values_list("pk", "name", "price_xof"))
+    for start in range(0, orders, batch_size):
+        order_batch = []
+        for i in range(start, min(orders, start + batch_size)):
+            phone = f"+221 77 {i % 1000:03d} {i % 100:02d} {i % 97:02d}"
+            order_batch.append(
+                Order(
+                    status=rng.choice(Order.Status.values),
+                    payment_method=rng.choice(Order.PaymentMethod.values),
+                    customer_name=f"Client {i}",
+                    customer_phone=phone,
+                    customer_phone_normalized=normalize_phone(phone),
+                    address=f"Rue {i}",
+                    city=rng.choice(CITIES),
+                )
+            )
+        created_orders = Order.objects.bulk_create(order_batch)
+        items = []
+        for order in created_orders:
+            for product_id, name, price in rng.sample(product_rows, k=min(len(product_rows), rng.randint(1, 3))):
+                items.append(
+                    OrderItem(
+                        order_id=order.pk,
+                        product_id=product_id,
+                        product_name=name,
+                        quantity=rng.randint(1, 4),
+                        unit_price_xof=price,
+                    )
+                )
+        OrderItem.objects.bulk_create(items)
+
+    images.refresh_primary_images()
+    search.rebuild()
+    catalog.bump_version()
+    return {"categories": categories, "products": products, "orders": orders}
+
+
+def measure(call, iterations: int, setup=None) -> dict[str, float]:
+    """Latences (ms), requêtes et temps SQL, pic mémoire (Kio) de ``call``, après un appel de chauffe.
+
+    ``setup`` est rejoué avant chaque appel, hors chronométrage.
+    """
+    prepare = setup or (lambda: None)
+    prepare()
+    call()
+
+    durations = []
+    for _ in range(iterations):
+        prepare()
+        start = time.perf_counter()
+        call()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    prepare()
+    timings = metrics.RequestTimings()
+    with ExitStack() as stack:
+        timings.wrap_databases(stack)
+        call()
+
+    prepare()
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(durations, 50), 3),
+        "p95_ms": round(percentile(durations, 95), 3),
+        "mean_ms": round(sum(durations) / len(durations), 3) if durations else 0.0,
+        "queries": timings.queries,
+        "db_ms": round(timings.db_seconds * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def environment() -> dict[str, str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ""
+    return {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+    }
+
+
+def write_report(path: str, report: dict) -> None:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
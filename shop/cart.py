@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import uuid
 from dataclasses import dataclass
 
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from . import catalog
 from .models import Product
 
 
 CART_SESSION_KEY = "cart"
+CART_TOKEN_SESSION_KEY = "cart_token"
+CART_SUMMARY_SESSION_KEY = "cart_summary"
 
 
 @dataclass(frozen=True)
@@ -15,6 +24,22 @@ class CartLine:
     line_total_xof: int
 
 
+class CartState(dict):
+    """Contenu du panier; se manipule comme ``request.session`` avec les fonctions de ce module."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.modified = False
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.modified = True
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.modified = True
+
+
 def _get_cart_dict(session) -> dict[str, int]:
     cart = session.get(CART_SESSION_KEY)
     if not isinstance(cart, dict):
@@ -23,11 +48,21 @@ def _get_cart_dict(session) -> dict[str, int]:
     return cart
 
 
+def token(session) -> str:
+    """Identifiant opaque du panier, utilisé pour les réservations de stock."""
+    value = session.get(CART_TOKEN_SESSION_KEY)
+    if not value:
+        value = uuid.uuid4().hex
+        session[CART_TOKEN_SESSION_KEY] = value
+    return value
+
+
 def add(session, product_id: int, quantity: int = 1) -> None:
     cart = _get_cart_dict(session)
     key = str(product_id)
     cart[key] = int(cart.get(key, 0)) + int(quantity)
     session.modified = True
+    refresh_summary(session)
 
 
 def remove(session, product_id: int) -> None:
@@ -36,6 +71,7 @@ def remove(session, product_id: int) -> None:
     if key in cart:
         del cart[key]
         session.modified = True
+        refresh_summary(session)
 
 
 def set_quantity(session, product_id: int, quantity: int) -> None:
@@ -46,17 +82,159 @@ def set_quantity(session, product_id: int, quantity: int) -> None:
         if key in cart:
             del cart[key]
             session.modified = True
+            refresh_summary(session)
         return
 
     cart[key] = quantity
     session.modified = True
+    refresh_summary(session)
 
 
 def clear(session) -> None:
     session[CART_SESSION_KEY] = {}
+    session[CART_SUMMARY_SESSION_KEY] = {"count": 0, "total_xof": 0, "version": catalog.get_version()}
     session.modified = True
 
 
+def refresh_summary(session) -> dict[str, int]:
+    lines, total_xof = build_lines(_get_cart_dict(session))
+    value = {
+        "count": sum(line.quantity for line in lines),
+        "total_xof": total_xof,
+        "version": catalog.get_version(),
+    }
+    session[CART_SUMMARY_SESSION_KEY] = value
+    return value
+
+
+def summary(session) -> dict[str, int]:
+    """Résumé (articles, total, version du catalogue) maintenu à chaque modification du panier.
+
+    Les produits ne sont relus que si le catalogue a changé depuis le calcul du résumé.
+    """
+    value = session.get(CART_SUMMARY_SESSION_KEY)
+    if isinstance(value, dict) and value.get("version") == catalog.get_version():
+        return value
+    if not session.get(CART_SESSION_KEY):
+        return {"count": 0, "total_xof": 0, "version": catalog.get_version()}
+    return refresh_summary(session)
+
+
+def _parse_items(raw: str) -> dict[str, int]:
+    items = {}
+    for pair in raw.split(","):
+        product_id, _, quantity = pair.partition(":")
+        if product_id.isdigit() and quantity.isdigit() and int(quantity) > 0:
+            items[product_id] = int(quantity)
+    return items
+
+
+class BaseCartStorage:
+    def load(self, request) -> CartState:
+        raise NotImplementedError
+
+    def save(self, request, response, state: CartState) -> None:
+        raise NotImplementedError
+
+
+class SessionCartStorage(BaseCartStorage):
+    """Panier dans la session Django (écrit en base avec le moteur de session par défaut)."""
+
+    def load(self, request) -> CartState:
+        keys = (CART_SESSION_KEY, CART_TOKEN_SESSION_KEY, CART_SUMMARY_SESSION_KEY)
+        return CartState({key: request.session[key] for key in keys if key in request.session})
+
+    def save(self, request, response, state: CartState) -> None:
+        request.session.update(state)
+        request.session.modified = True
+
+
+class SignedCookieCartStorage(BaseCartStorage):
+    """Panier dans un cookie signé compact: ``token|id:qté,id:qté|articles:total:version``."""
+
+    salt = "shop.cart"
+
+    def load(self, request) -> CartState:
+        raw = request.get_signed_cookie(
+            settings.SHOP_CART_COOKIE_NAME, default=None, salt=self.salt, max_age=settings.SHOP_CART_MAX_AGE
+        )
+        state = CartState()
+        if raw:
+            cart_token, _, rest = raw.partition("|")
+            items, _, cart_summary = rest.partition("|")
+            if cart_token:
+                dict.__setitem__(state, CART_TOKEN_SESSION_KEY, cart_token)
+            dict.__setitem__(state, CART_SESSION_KEY, _parse_items(items))
+            values = cart_summary.split(":")
+            if len(values) == 3 and all(value.isdigit() for value in values):
+                count, total_xof, version = (int(value) for value in values)
+                dict.__setitem__(
+                    state,
+                    CART_SUMMARY_SESSION_KEY,
+                    {"count": count, "total_xof": total_xof, "version": version},
+                )
+        return state
+
+    def save(self, request, response, state: CartState) -> None:
+        items = state.get(CART_SESSION_KEY) or {}
+        cart_token = state.get(CART_TOKEN_SESSION_KEY) or ""
+        if not items and not cart_token:
+            response.delete_cookie(settings.SHOP_CART_COOKIE_NAME, samesite="Lax")
+            return
+
+        value = cart_token + "|" + ",".join(f"{key}:{int(qty)}" for key, qty in items.items())
+        cart_summary = state.get(CART_SUMMARY_SESSION_KEY)
+        if cart_summary:
+            value += f"|{cart_summary['count']}:{cart_summary['total_xof']}:{cart_summary['version']}"
+        response.set_signed_cookie(
+            settings.SHOP_CART_COOKIE_NAME,
+            value,
+            salt=self.salt,
+            max_age=settings.SHOP_CART_MAX_AGE,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite="Lax",
+        )
+
+
+class CacheCartStorage(BaseCartStorage):
+    """Panier dans le cache Django; le cookie signé ne contient que l'identifiant du panier."""
+
+    salt = "shop.cart.id"
+
+    def _key(self, cart_id: str) -> str:
+        return f"shop:cart:{cart_id}"
+
+    def _cart_id(self, request) -> str | None:
+        return request.get_signed_cookie(
+            settings.SHOP_CART_COOKIE_NAME, default=None, salt=self.salt, max_age=settings.SHOP_CART_MAX_AGE
+        )
+
+    def load(self, request) -> CartState:
+        cart_id = self._cart_id(request)
+        data = cache.get(self._key(cart_id)) if cart_id else None
+        return CartState(data or {})
+
+    def save(self, request, response, state: CartState) -> None:
+        cart_id = self._cart_id(request)
+        if cart_id is None:
+            cart_id = uuid.uuid4().hex
+            response.set_signed_cookie(
+                settings.SHOP_CART_COOKIE_NAME,
+                cart_id,
+                salt=self.salt,
+                max_age=settings.SHOP_CART_MAX_AGE,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+        cache.set(self._key(cart_id), dict(state), settings.SHOP_CART_MAX_AGE)
+
+
+def get_storage() -> BaseCartStorage:
+    return import_string(settings.SHOP_CART_STORAGE)()
+
+
 def build_lines(cart_dict: dict[str, int]) -> tuple[list[CartLine], int]:
     product_ids: list[int] = []
     for key in cart_dict.keys():
@@ -65,8 +243,7 @@ def build_lines(cart_dict: dict[str, int]) -> tuple[list[CartLine], int]:
         except ValueError:
             continue
 
-    products = Product.objects.filter(is_active=True, id__in=product_ids).prefetch_related("images")
-    product_map = {p.id: p for p in products}
+    product_map = catalog.products_by_id(product_ids)
 
     lines: list[CartLine] = []
     total_xof = 0
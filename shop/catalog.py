@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import outbox, routers
+from .models import Category, Product
+
+
+VERSION_KEY = "shop:catalog:version"
+# Stock seul (commandes): n'invalide ni la navigation ni les produits en cache, seulement pages et facettes.
+STOCK_VERSION_KEY = "shop:catalog:stock-version"
+REPLICA_BUMP_KEY = "shop:catalog:replica-bump"
+
+REPLICA_CAUGHT_UP = "catalog.replica_caught_up"
+
+# Les entrées sont versionnées: l'expiration sert seulement à libérer les anciennes versions.
+# Elles sont remplies depuis le primaire (``routers.use_primary``): lue sur un réplica en retard juste
+# après ``invalidate()``, une ancienne ligne resterait en cache sous la nouvelle version.
+DEFAULT_TIMEOUT = 60 * 60 * 24
+
+_memo: dict[str, tuple[int, object]] = {}
+_memo_lock = threading.Lock()
+
+
+def _initial_version() -> int:
+    # Basée sur l'horloge pour ne jamais réutiliser une version après vidage du cache.
+    return time.time_ns() // 1000
+
+
+def get_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), None)
+        version = cache.get(VERSION_KEY) or _initial_version()
+    return int(version)
+
+
+async def aget_version() -> int:
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, _initial_version(), None)
+        version = await cache.aget(VERSION_KEY) or _initial_version()
+    return int(version)
+
+
+def bump_version() -> None:
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, _initial_version(), None)
+
+
+def get_stock_version() -> int:
+    version = cache.get(STOCK_VERSION_KEY)
+    if version is None:
+        cache.add(STOCK_VERSION_KEY, _initial_version(), None)
+        version = cache.get(STOCK_VERSION_KEY) or _initial_version()
+    return int(version)
+
+
+def bump_stock_version() -> None:
+    try:
+        cache.incr(STOCK_VERSION_KEY)
+    except ValueError:
+        cache.set(STOCK_VERSION_KEY, _initial_version(), None)
+
+
+def stock_changed() -> None:
+    """Nouvelle version du stock après le commit de la transaction en cours (une fois, même après réessai)."""
+    transaction.on_commit(bump_stock_version)
+
+
+def invalidate() -> None:
+    """Change la version du catalogue maintenant et après le commit de la transaction en cours."""
+    bump_version()
+    transaction.on_commit(bump_version)
+    transaction.on_commit(_schedule_replica_bump)
+
+
+def _schedule_replica_bump() -> None:
+    # Pages et ETag calculés depuis un réplica pas encore à jour: nouvelle version quand il a rattrapé
+    # le primaire. Un message par fenêtre de retard; le délai double couvre les modifications de la fenêtre.
+    lag = getattr(settings, "SHOP_REPLICA_LAG", 5)
+    if routers.has_replica() and cache.add(REPLICA_BUMP_KEY, 1, lag):
+        outbox.enqueue(REPLICA_CAUGHT_UP, delay=timedelta(seconds=2 * lag))
+
+
+@outbox.handler(REPLICA_CAUGHT_UP)
+def replica_caught_up(payload: dict) -> None:
+    bump_version()
+
+
+def cached(name: str, builder, timeout=DEFAULT_TIMEOUT):
+    """Valeur ``builder()`` mise en cache (mémoire du processus puis cache Django) pour la version courante."""
+    version = get_version()
+    entry = _memo.get(name)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    key = f"shop:catalog:{version}:{name}"
+    value = cache.get(key)
+    if value is None:
+        with routers.use_primary():
+            value = builder()
+        cache.set(key, value, timeout)
+
+    with _memo_lock:
+        _memo[name] = (version, value)
+    return value
+
+
+async def acached(name: str, builder, timeout=DEFAULT_TIMEOUT):
+    """Version asynchrone de ``cached``; ``builder`` est une coroutine."""
+    version = await aget_version()
+    entry = _memo.get(name)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    key = f"shop:catalog:{version}:{name}"
+    value = await cache.aget(key)
+    if value is None:
+        with routers.use_primary():
+            value = await builder()
+        await cache.aset(key, value, timeout)
+
+    with _memo_lock:
+        _memo[name] = (version, value)
+    return value
+
+
+def active_categories() -> list[Category]:
+    return cached(
+        "active-categories",
+        lambda: list(Category.objects.filter(is_active=True).order_by("name")),
+    )
+
+
+def active_categories_by_slug() -> dict[str, Category]:
+    return cached(
+        "active-categories-by-slug",
+        lambda: {category.slug: category for category in active_categories()},
+    )
+
+
+def category_by_slug(slug: str) -> Category | None:
+    return active_categories_by_slug().get(slug)
+
+
+async def aactive_categories() -> list[Category]:
+    async def build():
+        return [category async for category in Category.objects.filter(is_active=True).order_by("name")]
+
+    return await acached("active-categories", build)
+
+
+async def acategory_by_slug(slug: str) -> Category | None:
+    async def build():
+        return {category.slug: category for category in await aactive_categories()}
+
+    return (await acached("active-categories-by-slug", build)).get(slug)
+
+
+def _fetch_products(product_ids) -> dict[int, Product]:
+    return {
+        product.pk: product
+        for product in Product.objects.filter(is_active=True, pk__in=product_ids).select_related("primary_image")
+    }
+
+
+def products_by_id(product_ids) -> dict[int, Product]:
+    """Produits actifs (avec image principale) par id, en un seul ``get_many`` quand le cache est chaud."""
+    if routers.pinned():
+        # Commande: nom et prix relus au primaire, jamais ceux d'une version en cache.
+        return _fetch_products([int(pk) for pk in product_ids])
+
+    version = get_version()
+    keys = {f"shop:catalog:{version}:product:{int(pk)}": int(pk) for pk in product_ids}
+    if not keys:
+        return {}
+
+    found = cache.get_many(list(keys))
+    # False marque un produit absent ou inactif.
+    products = {keys[key]: product for key, product in found.items() if product}
+    missing = [pk for key, pk in keys.items() if key not in found]
+    if missing:
+        with routers.use_primary():
+            fetched = _fetch_products(missing)
+        cache.set_many(
+            {f"shop:catalog:{version}:product:{pk}": fetched.get(pk, False) for pk in missing}, DEFAULT_TIMEOUT
+        )
+        products.update(fetched)
+    return products
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import re
+import zlib
+from typing import AsyncIterator, Callable, Iterator
+
+from django.conf import settings
+
+from .media import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # Optionnel.
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optionnel.
+    zstandard = None
+
+
+# Types dont le corps gagne à être compressé; les images, archives et polices woff sont déjà compressées.
+COMPRESSIBLE_TYPES = re.compile(
+    r"^(text/|application/(json|javascript|x-javascript|xml|x-ndjson|manifest\+json)|image/svg\+xml)", re.I
+)
+
+DEFAULT_LEVELS = {"br": 4, "zstd": 3, "gzip": 6}
+
+# Octets reçus entre deux envois dans une réponse en flux.
+FLUSH_SIZE = 16 * 1024
+
+
+class Encoder:
+    """Compression incrémentale; ``flush()`` rend décodable côté client tout ce qui a été fourni."""
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def flush(self) -> bytes:
+        raise NotImplementedError
+
+    def finish(self) -> bytes:
+        raise NotImplementedError
+
+
+class GzipEncoder(Encoder):
+    def __init__(self, level: int):
+        # wbits 31: en-tête et somme de contrôle gzip.
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+class BrotliEncoder(Encoder):
+    def __init__(self, level: int):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+class ZstdEncoder(Encoder):
+    def __init__(self, level: int):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+def available_encoders() -> dict[str, Callable[[int], Encoder]]:
+    """Codages utilisables ici, par ordre de préférence du serveur."""
+    encoders = {}
+    if brotli is not None:
+        encoders["br"] = BrotliEncoder
+    if zstandard is not None:
+        encoders["zstd"] = ZstdEncoder
+    encoders["gzip"] = GzipEncoder
+    return encoders
+
+
+def level(coding: str) -> int:
+    return {**DEFAULT_LEVELS, **getattr(settings, "SHOP_COMPRESSION_LEVELS", {})}[coding]
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    accepted = accepted_encodings(accept_encoding)
+    for coding in getattr(settings, "SHOP_COMPRESSION_ENCODINGS", ("br", "zstd", "gzip")):
+        if coding in accepted and coding in available_encoders():
+            return coding
+    return None
+
+
+def encoder(coding: str) -> Encoder:
+    return available_encoders()[coding](level(coding))
+
+
+def compress(coding: str, data: bytes) -> bytes:
+    compressor = encoder(coding)
+    return compressor.compress(data) + compressor.finish()
+
+
+class _Stream:
+    # Vidé dès FLUSH_SIZE octets reçus: un flush par petit morceau (ligne de CSV) gonflerait la sortie.
+    def __init__(self, coding: str):
+        self.compressor = encoder(coding)
+        self.pending = 0
+
+    def feed(self, data: bytes) -> bytes:
+        if not data:
+            return b""
+        output = self.compressor.compress(data)
+        self.pending += len(data)
+        if self.pending >= FLUSH_SIZE:
+            self.pending = 0
+            output += self.compressor.flush()
+        return output
+
+
+def compress_stream(coding: str, chunks) -> Iterator[bytes]:
+    stream = _Stream(coding)
+    for data in chunks:
+        if output := stream.feed(data):
+            yield output
+    yield stream.compressor.finish()
+
+
+async def acompress_stream(coding: str, chunks) -> AsyncIterator[bytes]:
+    stream = _Stream(coding)
+    async for data in chunks:
+        if output := stream.feed(data):
+            yield output
+    yield stream.compressor.finish()
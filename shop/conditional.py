@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib import messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+
+from . import cart, catalog
+
+
+def _has_pending_messages(request) -> bool:
+    return bool(len(messages.get_messages(request)))
+
+
+def catalog_etag(request, *args, **kwargs) -> str | None:
+    """ETag d'une page catalogue, calculé sans rendu: versions du catalogue et du stock + URL + état du visiteur."""
+    if _has_pending_messages(request):
+        return None
+
+    state = getattr(request, "cart", None)
+    cart_count = cart.summary(state)["count"] if state is not None else 0
+    parts = [
+        str(catalog.get_version()),
+        str(catalog.get_stock_version()),
+        request.get_full_path(),
+        str(cart_count),
+        "staff" if request.user.is_staff else "",
+        # Le jeton CSRF des formulaires dépend du cookie.
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+    ]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def catalog_page(view):
+    """Répond 304 aux requêtes conditionnelles d'une page catalogue et impose la revalidation.
+
+    Pas de Last-Modified: une date seule ne couvre pas l'état du visiteur (panier, staff, CSRF) de l'ETag.
+    """
+    conditional_view = condition(etag_func=catalog_etag)(view)
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        response = conditional_view(request, *args, **kwargs)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    return wrapped
+
+
+def _quoted_etag(request) -> str | None:
+    etag = catalog_etag(request)
+    return quote_etag(etag) if etag is not None else None
+
+
+def async_catalog_page(view):
+    """``catalog_page`` pour une vue asynchrone (``condition`` ne les prend pas en charge en Django 4.2)."""
+
+    @wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        # Messages, panier et utilisateur se lisent en synchrone: un seul passage par le thread.
+        etag = await sync_to_async(_quoted_etag)(request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await view(request, *args, **kwargs)
+
+        if request.method in ("GET", "HEAD") and etag:
+            response.headers.setdefault("ETag", etag)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    return wrapped
@@ -1,17 +1,16 @@
 from __future__ import annotations
 
-from .models import Category
+from . import cart, catalog
 
 
 def shop_context(request):
-    cart = request.session.get("cart", {})
     cart_count = 0
-    if isinstance(cart, dict):
-        cart_count = sum(int(qty) for qty in cart.values() if str(qty).isdigit())
+    state = getattr(request, "cart", None)
+    if state is not None:
+        cart_count = cart.summary(state)["count"]
 
     return {
         "site_name": "Makhou Sport",
-        "nav_categories": Category.objects.filter(is_active=True).order_by("name"),
+        "nav_categories": catalog.active_categories(),
         "cart_count": cart_count,
     }
-
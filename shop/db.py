@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+
+def _is_lock_error(exc: OperationalError) -> bool:
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+
+@contextmanager
+def immediate_atomic(using: str = DEFAULT_DB_ALIAS):
+    """``transaction.atomic()`` ouverte par ``BEGIN IMMEDIATE`` avec le backend ``shop.backends.sqlite3``.
+
+    Sans effet particulier ailleurs, ou dans une transaction déjà ouverte.
+    """
+    connection = connections[using]
+    if connection.in_atomic_block or not hasattr(connection, "begin_immediate"):
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using):
+            connection.begin_immediate = False
+            yield
+    finally:
+        connection.begin_immediate = False
+
+
+def write_transaction(func, using: str = DEFAULT_DB_ALIAS, attempts: int | None = None):
+    """Exécute ``func()`` dans ``immediate_atomic``; réessaie si la base est verrouillée.
+
+    Chaque échec annule la transaction: la tentative suivante repart de zéro, après une attente croissante.
+    """
+    attempts = attempts or getattr(settings, "SHOP_WRITE_ATTEMPTS", 3)
+    backoff = getattr(settings, "SHOP_WRITE_RETRY_BACKOFF", 0.05)
+    for attempt in range(1, attempts + 1):
+        try:
+            with immediate_atomic(using):
+                return func()
+        except OperationalError as exc:
+            if attempt == attempts or not _is_lock_error(exc) or connections[using].in_atomic_block:
+                raise
+        time.sleep(backoff * 2 ** (attempt - 1) * (1 + random.random()))
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+# Pas d'import Django ici: build() tourne dans les processus du pool de build_image_derivatives.
+
+from pathlib import Path, PurePosixPath
+
+from PIL import Image, ImageOps
+
+
+WIDTHS = (320, 640, 960)
+
+JPEG_QUALITY = 80
+WEBP_QUALITY = 75
+
+FORMATS = {
+    "jpeg": ("JPEG", ".jpeg", {"quality": JPEG_QUALITY, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", ".webp", {"quality": WEBP_QUALITY, "method": 4}),
+}
+
+
+def derivative_name(name: str, width: int, fmt: str) -> str:
+    path = PurePosixPath(name)
+    return str(PurePosixPath("derivatives") / path.parent / f"{path.stem}-{width}w{FORMATS[fmt][1]}")
+
+
+def build(source_path: str, media_root: str, name: str, widths=WIDTHS) -> dict[str, list[int]]:
+    """Écrit les dérivés de ``name`` sous ``media_root`` et retourne les largeurs produites par format.
+
+    Le JPEG d'origine sert déjà de plus grande taille: seul le WebP est produit à pleine largeur.
+    """
+    produced: dict[str, list[int]] = {"jpeg": [], "webp": []}
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        full_width, full_height = image.size
+        targets = sorted({width for width in widths if width < full_width} | {full_width})
+        for width in targets:
+            if width == full_width:
+                resized = image
+            else:
+                height = max(1, round(full_height * width / full_width))
+                resized = image.resize((width, height), Image.Resampling.LANCZOS)
+
+            for fmt, (pil_format, _, params) in FORMATS.items():
+                if fmt == "jpeg" and width == full_width:
+                    continue
+                target = Path(media_root) / derivative_name(name, width, fmt)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                resized.save(target, pil_format, **params)
+                produced[fmt].append(width)
+
+    return produced
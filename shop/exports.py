@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import csv
+import json
+from itertools import islice
+from typing import Iterator
+
+from django.db.models import QuerySet
+
+from .models import Order, OrderItem
+
+
+ORDER_FIELDS = (
+    "id",
+    "created_at",
+    "status",
+    "payment_method",
+    "customer_name",
+    "customer_phone",
+    "customer_email",
+    "address",
+    "city",
+    "notes",
+    "total_xof",
+)
+ITEM_FIELDS = ("product_id", "product_name", "quantity", "unit_price_xof")
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "jsonl": ("application/x-ndjson; charset=utf-8", "jsonl"),
+}
+
+CHUNK_SIZE = 1000
+
+# Début de cellule interprété comme une formule par les tableurs (injection via nom, adresse, notes...).
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class _Echo:
+    # csv.writer écrit dans un « fichier » qui retourne simplement la ligne.
+    def write(self, value: str) -> str:
+        return value
+
+
+def orders_with_items(queryset: QuerySet, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple[Order, list[OrderItem]]]:
+    """Commandes et leurs lignes, par paquets: une requête de lignes par paquet de commandes."""
+    orders = queryset.only(*ORDER_FIELDS).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(orders, chunk_size)):
+        items: dict[int, list[OrderItem]] = {}
+        for item in OrderItem.objects.filter(order_id__in=[order.pk for order in chunk]).order_by("order_id", "pk"):
+            items.setdefault(item.order_id, []).append(item)
+        for order in chunk:
+            yield order, items.get(order.pk, [])
+
+
+def _order_values(order: Order) -> list:
+    return [
+        order.created_at.isoformat() if name == "created_at" else getattr(order, name) for name in ORDER_FIELDS
+    ]
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def csv_lines(queryset: QuerySet, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Une ligne CSV par ligne de commande (colonnes de la commande répétées)."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(["order_id", *ORDER_FIELDS[1:], *ITEM_FIELDS])
+    for order, items in orders_with_items(queryset, chunk_size):
+        values = [_csv_cell(value) for value in _order_values(order)]
+        if not items:
+            yield writer.writerow(values + [""] * len(ITEM_FIELDS))
+        for item in items:
+            yield writer.writerow(values + [_csv_cell(getattr(item, name)) for name in ITEM_FIELDS])
+
+
+def jsonl_lines(queryset: QuerySet, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Un objet JSON par commande, lignes incluses."""
+    for order, items in orders_with_items(queryset, chunk_size):
+        record = dict(zip(ORDER_FIELDS, _order_values(order)))
+        record["items"] = [{name: getattr(item, name) for name in ITEM_FIELDS} for item in items]
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def export_lines(queryset: QuerySet, fmt: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    if fmt == "jsonl":
+        return jsonl_lines(queryset, chunk_size)
+    return csv_lines(queryset, chunk_size)
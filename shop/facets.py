@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, QuerySet
+from django.http import QueryDict
+
+from . import catalog, routers
+
+
+# Tranches de prix: (valeur de ?prix=, libellé, minimum inclus, maximum exclu), en FCFA.
+PRICE_BUCKETS = (
+    ("moins-3000", "Moins de 3 000 FCFA", None, 3000),
+    ("3000-5000", "3 000 – 5 000 FCFA", 3000, 5000),
+    ("5000-10000", "5 000 – 10 000 FCFA", 5000, 10000),
+    ("plus-10000", "10 000 FCFA et plus", 10000, None),
+)
+
+PARAMS = ("categorie", "prix", "dispo")
+
+IN_STOCK = Q(stock__gt=0)
+
+
+def _price_q(low: int | None, high: int | None) -> Q:
+    condition = Q()
+    if low is not None:
+        condition &= Q(price_xof__gte=low)
+    if high is not None:
+        condition &= Q(price_xof__lt=high)
+    return condition
+
+
+@dataclass(frozen=True)
+class Selection:
+    """Filtres choisis (?categorie=, ?prix=, ?dispo=1); les valeurs inconnues sont ignorées."""
+
+    categorie: str = ""
+    prix: str = ""
+    dispo: bool = False
+
+    @classmethod
+    def from_query(cls, params) -> Selection:
+        prix = params.get("prix") or ""
+        return cls(
+            categorie=(params.get("categorie") or "").strip(),
+            prix=prix if prix in {bucket[0] for bucket in PRICE_BUCKETS} else "",
+            dispo=params.get("dispo") == "1",
+        )
+
+    def items(self) -> list[tuple[str, str]]:
+        values = {"categorie": self.categorie, "prix": self.prix, "dispo": "1" if self.dispo else ""}
+        return [(name, values[name]) for name in PARAMS if values[name]]
+
+    def condition(self, without: str | None = None) -> Q:
+        """Filtres choisis, sauf ``without``: le compte d'une facette ignore sa propre valeur."""
+        condition = Q()
+        if self.categorie and without != "categorie":
+            condition &= Q(category__slug=self.categorie)
+        if self.prix and without != "prix":
+            bucket = next(bucket for bucket in PRICE_BUCKETS if bucket[0] == self.prix)
+            condition &= _price_q(bucket[2], bucket[3])
+        if self.dispo and without != "dispo":
+            condition &= IN_STOCK
+        return condition
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        return queryset.filter(self.condition())
+
+
+def _count(condition: Q) -> Count:
+    return Count("pk", filter=condition) if condition else Count("pk")
+
+
+def aggregates(selection: Selection, category_ids: list[int]) -> dict[str, Count]:
+    """Un ``Count`` conditionnel par valeur de facette, plus le total filtré: une seule requête."""
+    exprs = {"total": _count(selection.condition())}
+    exprs["dispo"] = _count(selection.condition(without="dispo") & IN_STOCK)
+    for index, (_, _, low, high) in enumerate(PRICE_BUCKETS):
+        exprs[f"prix_{index}"] = _count(selection.condition(without="prix") & _price_q(low, high))
+    other_filters = selection.condition(without="categorie")
+    for category_id in category_ids:
+        exprs[f"categorie_{category_id}"] = _count(other_filters & Q(category_id=category_id))
+    return exprs
+
+
+def _cache_key(base: QuerySet, selection: Selection, category_ids: list[int], version: int, stock: int) -> str:
+    sql, params = base.query.sql_with_params()
+    digest = hashlib.sha1(f"{sql}|{params!r}|{selection.items()!r}|{category_ids!r}".encode()).hexdigest()
+    # Version du stock: le compte « En stock » change avec les commandes.
+    return f"shop:facets:{version}:{stock}:{digest}"
+
+
+def _timeout() -> int:
+    return getattr(settings, "SHOP_FACET_CACHE_TIMEOUT", 300)
+
+
+@dataclass
+class Option:
+    label: str
+    count: int
+    selected: bool
+    query: str
+
+
+@dataclass
+class Facets:
+    """Comptes des facettes pour la recherche courante, et liens pour (dé)sélectionner chaque valeur."""
+
+    total: int
+    prices: list[Option] = field(default_factory=list)
+    categories: list[Option] = field(default_factory=list)
+    in_stock: Option | None = None
+
+
+def _link(filter_query: str, name: str, value: str) -> str:
+    query = QueryDict(filter_query, mutable=True)
+    if value:
+        query[name] = value
+    else:
+        query.pop(name, None)
+    return query.urlencode()
+
+
+def build(counts: dict[str, int], selection: Selection, categories, filter_query: str) -> Facets:
+    facets = Facets(total=counts["total"])
+    facets.in_stock = Option(
+        "En stock uniquement",
+        counts["dispo"],
+        selection.dispo,
+        _link(filter_query, "dispo", "" if selection.dispo else "1"),
+    )
+    for index, (value, label, _, _) in enumerate(PRICE_BUCKETS):
+        selected = selection.prix == value
+        facets.prices.append(
+            Option(label, counts[f"prix_{index}"], selected, _link(filter_query, "prix", "" if selected else value))
+        )
+    for category in categories:
+        selected = selection.categorie == category.slug
+        facets.categories.append(
+            Option(
+                category.name,
+                counts.get(f"categorie_{category.pk}", 0),
+                selected,
+                _link(filter_query, "categorie", "" if selected else category.slug),
+            )
+        )
+    return facets
+
+
+def _zero(selection: Selection, category_ids: list[int]) -> dict[str, int]:
+    return dict.fromkeys(aggregates(selection, category_ids), 0)
+
+
+def counts(base: QuerySet, selection: Selection, category_ids: list[int]) -> dict[str, int]:
+    """Comptes mis en cache par versions du catalogue et du stock, et par recherche (requête de base + filtres)."""
+    if base.query.is_empty():
+        # Recherche sans terme utilisable (``?q=!!``): pas de SQL à compter ni à mettre en cache.
+        return _zero(selection, category_ids)
+    key = _cache_key(base, selection, category_ids, catalog.get_version(), catalog.get_stock_version())
+    value = cache.get(key)
+    if value is None:
+        # Comme les entrées de ``catalog``: calculées sur le primaire, jamais sur un réplica en retard.
+        with routers.use_primary():
+            value = base.order_by().aggregate(**aggregates(selection, category_ids))
+        cache.set(key, value, _timeout())
+    return value
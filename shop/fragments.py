@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = "shop/_product_card.html"
+
+CARD_TIMEOUT = 60 * 60 * 24
+
+
+def card_key(product_id: int) -> str:
+    return f"shop:card:{product_id}"
+
+
+def card_stamp(product) -> str:
+    """Tout ce que la carte affiche et qui peut changer sans ``save()`` du produit."""
+    image = product.main_image
+    image_version = f"{image.pk}:{image.image.name}:{bool(image.derivatives)}" if image else "-"
+    return f"{product.updated_at.timestamp()}|{image_version}|{product.stock}|{product.category.name}"
+
+
+def render_cards(products) -> str:
+    """Rend les cartes produit avec un seul ``get_many`` (et un ``set_many`` pour les manquantes)."""
+    products = list(products)
+    cached = cache.get_many([card_key(product.pk) for product in products])
+
+    fragments = []
+    missing = {}
+    for product in products:
+        key = card_key(product.pk)
+        stamp = card_stamp(product)
+        entry = cached.get(key)
+        if entry is not None and entry[0] == stamp:
+            fragments.append(entry[1])
+            continue
+
+        html = render_to_string(CARD_TEMPLATE, {"product": product})
+        missing[key] = (stamp, html)
+        fragments.append(html)
+
+    if missing:
+        cache.set_many(missing, CARD_TIMEOUT)
+    return mark_safe("\n".join(fragments))
+
+
+def invalidate_cards(product_ids) -> None:
+    cache.delete_many([card_key(product_id) for product_id in product_ids])
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+
+from . import catalog, derivatives, fragments, outbox
+from .models import Product, ProductImage, read_dimensions
+
+
+logger = logging.getLogger(__name__)
+
+BUILD_DERIVATIVES = "image.derivatives"
+
+
+def refresh_primary_images(product_ids=None) -> int:
+    """Recalcule ``Product.primary_image`` en une seule requête UPDATE."""
+    first_image = (
+        ProductImage.objects.filter(product=OuterRef("pk")).order_by("sort_order", "id").values("pk")[:1]
+    )
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=list(product_ids))
+    return products.update(primary_image=Subquery(first_image))
+
+
+def fill_dimensions(images) -> list[ProductImage]:
+    updated = []
+    for image in images:
+        if not image.image:
+            continue
+        width, height = read_dimensions(image.image)
+        if width is None:
+            continue
+        image.width, image.height = width, height
+        updated.append(image)
+
+    ProductImage.objects.bulk_update(updated, ["width", "height"])
+    return updated
+
+
+def generate_derivatives(image: ProductImage) -> dict[str, list[int]]:
+    """Produit les dérivés d'une image dans le processus courant et les enregistre."""
+    storage = image.image.storage
+    produced = derivatives.build(storage.path(image.image.name), str(settings.MEDIA_ROOT), image.image.name)
+    ProductImage.objects.filter(pk=image.pk).update(derivatives=produced)
+    image.derivatives = produced
+    return produced
+
+
+def queue_derivatives(image: ProductImage) -> None:
+    """Dérivés produits par process_outbox, hors de la requête et de la transaction de l'enregistrement."""
+    outbox.enqueue(BUILD_DERIVATIVES, {"image_id": image.pk})
+
+
+@outbox.handler(BUILD_DERIVATIVES)
+def build_queued_derivatives(payload: dict) -> None:
+    image = ProductImage.objects.filter(pk=payload["image_id"]).first()
+    if image is None or not image.image or image.derivatives:
+        return
+    try:
+        generate_derivatives(image)
+    except NotImplementedError:
+        # Stockage sans chemin local: réessayer n'y changera rien.
+        logger.warning("Dérivés impossibles pour l'image %s (stockage sans chemin local).", image.pk)
+        return
+    fragments.invalidate_cards([image.product_id])
+    catalog.invalidate()
+
+
+def srcset(image: ProductImage, fmt: str) -> str:
+    storage = image.image.storage
+    entries = [
+        f"{storage.url(derivatives.derivative_name(image.image.name, width, fmt))} {width}w"
+        for width in (image.derivatives or {}).get(fmt, [])
+    ]
+    if fmt == "jpeg" and entries and image.width:
+        entries.append(f"{image.image.url} {image.width}w")
+    return ", ".join(entries)
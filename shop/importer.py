@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import csv
+import json
+import re
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from . import catalog, fragments, images, search
+from .models import Category, Product, ProductImage, read_dimensions
+
+
+CHUNK_SIZE = 64 * 1024
+
+TRUE_VALUES = {"1", "true", "vrai", "oui", "yes", "y"}
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+@dataclass
+class ImportStats:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def skip(self, line: int, reason: str) -> None:
+        self.skipped += 1
+        self.errors.append(f"enregistrement {line}: {reason}")
+
+
+# --- Lecture en flux -------------------------------------------------------
+
+
+def detect_format(path: str) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if suffix == ".csv":
+        return "csv"
+    return "json"
+
+
+def read_records(path: str, fmt: str | None = None) -> Iterator[dict]:
+    """Enregistrements d'un fichier JSON (tableau), JSONL ou CSV, sans charger tout le fichier."""
+    fmt = fmt or detect_format(path)
+    with open(path, encoding="utf-8-sig", newline="") as handle:
+        if fmt == "csv":
+            yield from csv.DictReader(handle)
+        elif fmt == "jsonl":
+            for line in handle:
+                if line.strip():
+                    yield _as_record(json.loads(line))
+        else:
+            yield from _iter_json_array(handle)
+
+
+def _as_record(value) -> dict:
+    if not isinstance(value, dict):
+        raise InvalidRecord("Chaque enregistrement doit être un objet JSON.")
+    return value
+
+
+def _iter_json_array(handle, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    # Décode les éléments du tableau un par un: seul l'objet en cours reste en mémoire.
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+    started = False
+
+    def fill() -> bool:
+        nonlocal buffer, eof
+        chunk = handle.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer += chunk
+        return True
+
+    while True:
+        buffer = buffer.lstrip(" \t\r\n," if started else " \t\r\n")
+        if not buffer:
+            if fill():
+                continue
+            raise InvalidRecord("Fin de fichier inattendue: tableau JSON non terminé.")
+
+        if not started:
+            if buffer[0] != "[":
+                raise InvalidRecord("Le fichier JSON doit contenir un tableau d'objets.")
+            buffer = buffer[1:]
+            started = True
+            continue
+
+        if buffer[0] == "]":
+            return
+
+        try:
+            value, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if fill():
+                continue
+            raise
+        buffer = buffer[end:]
+        yield _as_record(value)
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# --- Normalisation ---------------------------------------------------------
+
+
+def _snake(key: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", key.strip()).lower()
+
+
+def _normalize(record: dict) -> dict:
+    """Clés en snake_case (``priceXof`` → ``price_xof``); les cellules CSV vides sont ignorées."""
+    return {_snake(key): value for key, value in record.items() if key and value != ""}
+
+
+def _bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def _int(value, name: str) -> int:
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise InvalidRecord(f"{name} invalide: {value!r}") from None
+    if number < 0:
+        raise InvalidRecord(f"{name} négatif: {value!r}")
+    return number
+
+
+def _image_names(value) -> list[str]:
+    if isinstance(value, str):
+        value = value.split("|")
+    # Les chemins du front (``/products/x.jpeg``) sont relatifs à MEDIA_ROOT côté Django.
+    return [str(name).strip().lstrip("/") for name in value if str(name).strip()]
+
+
+def _slug(data: dict, max_length: int) -> str:
+    slug = str(data.get("slug") or slugify(str(data.get("name", ""))))[:max_length]
+    if not slug:
+        raise InvalidRecord("slug ou nom manquant")
+    return slug
+
+
+# --- Catégories ------------------------------------------------------------
+
+
+def _category_values(data: dict) -> dict:
+    values = {}
+    if "name" in data:
+        values["name"] = str(data["name"])[:120]
+    if "description" in data:
+        values["description"] = str(data["description"])
+    if "is_active" in data:
+        values["is_active"] = _bool(data["is_active"])
+    return values
+
+
+def import_categories(records: Iterable[dict], batch_size: int = 500) -> tuple[ImportStats, dict[str, int]]:
+    """Importe les catégories par slug; retourne aussi les ids externes (``id``) → pk."""
+    stats = ImportStats()
+    refs: dict[str, int] = {}
+    line = 0
+    for batch in batched(records, batch_size):
+        rows: dict[str, tuple[int, dict, str | None]] = {}
+        for record in batch:
+            line += 1
+            data = _normalize(record)
+            try:
+                slug = _slug(data, 140)
+                values = _category_values(data)
+            except InvalidRecord as exc:
+                stats.skip(line, str(exc))
+                continue
+            rows[slug] = (line, values, str(data["id"]) if "id" in data else None)
+
+        existing = Category.objects.in_bulk(list(rows), field_name="slug")
+        created, changed = [], []
+        changed_fields: set[str] = set()
+        for slug, (row_line, values, _) in list(rows.items()):
+            category = existing.get(slug)
+            if category is None:
+                if "name" not in values:
+                    stats.skip(row_line, f"nom manquant pour la nouvelle catégorie {slug}")
+                    del rows[slug]
+                    continue
+                created.append(Category(slug=slug, **values))
+            elif fields := _apply(category, values):
+                changed.append(category)
+                changed_fields |= fields
+            else:
+                stats.unchanged += 1
+
+        with transaction.atomic():
+            Category.objects.bulk_create(created)
+            if changed:
+                # Seules les colonnes modifiées dans le lot: chacune coûte un CASE par ligne.
+                Category.objects.bulk_update(changed, sorted(changed_fields))
+            # Le nom de catégorie fait partie de l'index de recherche des produits.
+            for category in changed:
+                search.index_category(category.pk)
+            if created or changed:
+                catalog.invalidate()
+
+        stats.inserted += len(created)
+        stats.updated += len(changed)
+        by_slug = {category.slug: category.pk for category in [*existing.values(), *created]}
+        for slug, (_, _, external_id) in rows.items():
+            refs[slug] = by_slug[slug]
+            if external_id:
+                refs[external_id] = by_slug[slug]
+    return stats, refs
+
+
+# --- Produits --------------------------------------------------------------
+
+
+def _product_values(data: dict, category_refs: dict[str, int]) -> dict:
+    values = {}
+    reference = data.get("category_id", data.get("category"))
+    if reference is not None:
+        category_id = category_refs.get(str(reference))
+        if category_id is None:
+            raise InvalidRecord(f"catégorie inconnue: {reference!r}")
+        values["category_id"] = category_id
+    if "name" in data:
+        values["name"] = str(data["name"])[:160]
+    if "description" in data:
+        values["description"] = str(data["description"])
+    if "price_xof" in data:
+        values["price_xof"] = _int(data["price_xof"], "prix")
+    if "compare_at_price_xof" in data:
+        compare = data["compare_at_price_xof"]
+        values["compare_at_price_xof"] = None if compare is None else _int(compare, "ancien prix")
+    if "stock" in data:
+        values["stock"] = _int(data["stock"], "stock")
+    if "is_active" in data:
+        values["is_active"] = _bool(data["is_active"])
+    return values
+
+
+def _apply(instance, values: dict) -> set[str]:
+    changed = set()
+    for name, value in values.items():
+        if getattr(instance, name) != value:
+            setattr(instance, name, value)
+            changed.add(name)
+    return changed
+
+
+def import_products(
+    records: Iterable[dict], category_refs: dict[str, int] | None = None, batch_size: int = 500
+) -> ImportStats:
+    """Importe les produits par slug, un lot = une transaction et un nombre fixe de requêtes.
+
+    Une catégorie est référencée par son slug ou par un id externe de ``category_refs``
+    (voir ``import_categories``).
+    """
+    category_refs = {**dict(Category.objects.values_list("slug", "pk")), **(category_refs or {})}
+
+    stats = ImportStats()
+    # Un même fichier image est souvent partagé entre variantes: dimensions lues une fois.
+    dimensions: dict[str, tuple[int | None, int | None]] = {}
+    line = 0
+    for batch in batched(records, batch_size):
+        rows: dict[str, tuple[int, dict, list[str] | None]] = {}
+        for record in batch:
+            line += 1
+            data = _normalize(record)
+            try:
+                slug = _slug(data, 180)
+                values = _product_values(data, category_refs)
+            except InvalidRecord as exc:
+                stats.skip(line, str(exc))
+                continue
+            rows[slug] = (line, values, _image_names(data["images"]) if "images" in data else None)
+
+        existing = Product.objects.in_bulk(list(rows), field_name="slug")
+        current_images: dict[int, list[str]] = {}
+        for product_id, name in (
+            ProductImage.objects.filter(product_id__in=[product.pk for product in existing.values()])
+            .order_by("sort_order", "id")
+            .values_list("product_id", "image")
+        ):
+            current_images.setdefault(product_id, []).append(name)
+
+        now = timezone.now()
+        created, changed = [], []
+        changed_fields = {"updated_at"}
+        new_image_names: list[tuple[Product, list[str]]] = []
+        replaced_images: list[int] = []
+        for slug, (row_line, values, image_names) in rows.items():
+            product = existing.get(slug)
+            if product is None:
+                missing = {"category_id", "name", "price_xof"} - values.keys()
+                if missing:
+                    stats.skip(row_line, f"champs requis manquants pour {slug}: {', '.join(sorted(missing))}")
+                    continue
+                product = Product(slug=slug, **values)
+                created.append(product)
+                if image_names:
+                    new_image_names.append((product, image_names))
+                continue
+
+            fields = _apply(product, values)
+            images_changed = image_names is not None and image_names != current_images.get(product.pk, [])
+            if not (fields or images_changed):
+                stats.unchanged += 1
+                continue
+
+            product.updated_at = now
+            changed.append(product)
+            changed_fields |= fields
+            if images_changed:
+                replaced_images.append(product.pk)
+                new_image_names.append((product, image_names))
+
+        with transaction.atomic():
+            Product.objects.bulk_create(created)
+            Product.objects.bulk_update(changed, sorted(changed_fields))
+
+            if replaced_images:
+                ProductImage.objects.filter(product_id__in=replaced_images).delete()
+            new_images = []
+            for product, names in new_image_names:
+                for position, name in enumerate(names):
+                    image = ProductImage(product_id=product.pk, image=name, sort_order=position)
+                    if name not in dimensions:
+                        dimensions[name] = read_dimensions(image.image)
+                    image.width, image.height = dimensions[name]
+                    new_images.append(image)
+            ProductImage.objects.bulk_create(new_images)
+
+            touched = [product.pk for product in [*created, *changed]]
+            if touched:
+                images.refresh_primary_images(touched)
+                search.index_products(touched)
+                fragments.invalidate_cards(touched)
+                catalog.invalidate()
+
+        stats.inserted += len(created)
+        stats.updated += len(changed)
+    return stats
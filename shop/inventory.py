@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, IntegerField, OuterRef, PositiveIntegerField, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Product, StockReservation
+
+
+SWEEP_LOCK_KEY = "shop:reservations:sweep"
+
+
+class InsufficientStock(Exception):
+    pass
+
+
+def reservation_ttl() -> timedelta:
+    return timedelta(seconds=getattr(settings, "SHOP_RESERVATION_TTL", 900))
+
+
+def _needed(quantities: dict[int, int]) -> Case:
+    return Case(
+        *[When(pk=product_id, then=Value(int(quantity))) for product_id, quantity in quantities.items()],
+        output_field=PositiveIntegerField(),
+    )
+
+
+def _held(exclude_token: str | None = None) -> Coalesce:
+    """Quantité réservée par les autres paniers (sous-requête sur l'index produit/expiration)."""
+    holds = StockReservation.objects.filter(product=OuterRef("pk"), expires_at__gt=timezone.now())
+    if exclude_token:
+        holds = holds.exclude(cart_token=exclude_token)
+    total = holds.order_by().values("product").annotate(total=Sum("quantity")).values("total")[:1]
+    return Coalesce(Subquery(total, output_field=IntegerField()), Value(0))
+
+
+def available_stock(product_ids, token: str | None = None) -> dict[int, int]:
+    """Stock disponible = stock − réservations actives des autres paniers."""
+    rows = (
+        Product.objects.filter(pk__in=list(product_ids))
+        .annotate(held=_held(token))
+        .values_list("pk", "stock", "held")
+    )
+    return {pk: max(0, stock - held) for pk, stock, held in rows}
+
+
+def hold(token: str, quantities: dict[int, int]) -> dict[int, int]:
+    """Réserve pour ``token`` les quantités du panier (dans la limite du disponible).
+
+    Remplace les réservations précédentes du panier et retourne les quantités réservées.
+    """
+    available = available_stock(quantities, token) if quantities else {}
+    held = {
+        product_id: min(int(quantity), available.get(product_id, 0))
+        for product_id, quantity in quantities.items()
+    }
+    held = {product_id: quantity for product_id, quantity in held.items() if quantity > 0}
+
+    StockReservation.objects.filter(cart_token=token).exclude(product_id__in=list(held)).delete()
+    if held:
+        expires_at = timezone.now() + reservation_ttl()
+        StockReservation.objects.bulk_create(
+            [
+                StockReservation(product_id=product_id, cart_token=token, quantity=quantity, expires_at=expires_at)
+                for product_id, quantity in held.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["cart_token", "product"],
+            update_fields=["quantity", "expires_at"],
+        )
+    return held
+
+
+def release(token: str) -> None:
+    StockReservation.objects.filter(cart_token=token).delete()
+
+
+def sweep_expired(batch_size: int = 1000, max_batches: int | None = None) -> int:
+    """Supprime les réservations expirées par lots (via l'index d'expiration)."""
+    deleted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(
+            StockReservation.objects.filter(expires_at__lte=timezone.now())
+            .order_by("expires_at")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        deleted += StockReservation.objects.filter(pk__in=ids).delete()[0]
+        batches += 1
+    return deleted
+
+
+def maybe_sweep() -> None:
+    # Au plus une purge (d'un lot) par intervalle, tous processus confondus si le cache est partagé.
+    interval = getattr(settings, "SHOP_RESERVATION_SWEEP_INTERVAL", 60)
+    if cache.add(SWEEP_LOCK_KEY, 1, interval):
+        sweep_expired(max_batches=1)
+
+
+def decrement_stock(quantities: dict[int, int], token: str | None = None) -> None:
+    """Décrémente le stock de tous les produits en un seul UPDATE conditionnel.
+
+    Le stock réservé par les autres paniers reste intouchable. À appeler dans
+    ``transaction.atomic()``: si un produit n'a plus assez de stock disponible,
+    ``InsufficientStock`` est levée et la transaction doit être annulée.
+    """
+    if not quantities:
+        return
+
+    needed = _needed(quantities)
+    updated = Product.objects.filter(
+        pk__in=list(quantities), is_active=True, stock__gte=needed + _held(token)
+    ).update(stock=F("stock") - needed)
+    if updated != len(quantities):
+        raise InsufficientStock()
+
+
+def unavailable(quantities: dict[int, int], token: str | None = None) -> list[Product]:
+    """Produits dont le stock disponible ne couvre pas la quantité demandée."""
+    products = Product.objects.filter(pk__in=list(quantities)).annotate(held=_held(token))
+    return [
+        product
+        for product in products.only("id", "name", "stock", "is_active")
+        if not product.is_active or product.stock - product.held < quantities[product.pk]
+    ]
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shop import catalog, images
+from shop.models import Product, ProductImage
+
+
+class Command(BaseCommand):
+    help = "Renseigne l'image principale de chaque produit et les dimensions des images (par lots)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+
+        product_ids = list(Product.objects.order_by("pk").values_list("pk", flat=True))
+        updated_products = 0
+        for start in range(0, len(product_ids), batch_size):
+            with transaction.atomic():
+                updated_products += images.refresh_primary_images(product_ids[start : start + batch_size])
+
+        missing = ProductImage.objects.filter(width__isnull=True).order_by("pk")
+        updated_images = 0
+        last_pk = 0
+        while True:
+            batch = list(missing.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            updated_images += len(images.fill_dimensions(batch))
+
+        catalog.invalidate()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Images principales: {updated_products} produit(s). Dimensions: {updated_images} image(s)."
+            )
+        )
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import include, path
+
+from shop import bench
+from shop.models import Category, Product
+from shop.urls import build_urlpatterns
+
+
+def _urlconf(async_views: bool) -> ModuleType:
+    module = ModuleType(f"shop_bench_urls_{'asgi' if async_views else 'wsgi'}")
+    module.urlpatterns = [path("", include((build_urlpatterns(async_views), "shop")))]
+    return module
+
+
+def _summary(durations: list[float], elapsed: float) -> dict[str, float]:
+    return {
+        "requests": len(durations),
+        "rps": round(len(durations) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(bench.percentile(durations, 50), 3),
+        "p95_ms": round(bench.percentile(durations, 95), 3),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit des pages catalogue en WSGI (vues synchrones, threads) et en ASGI "
+        "(vues asynchrones, boucle d'événements) sur le même catalogue synthétique."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=10_000)
+        parser.add_argument("--orders", type=int, default=0)
+        parser.add_argument("--requests", type=int, default=300, help="Requêtes par mode et par concurrence.")
+        parser.add_argument("--concurrency", default="1,8,32", help="Niveaux de concurrence, séparés par des virgules.")
+        parser.add_argument("--output", default="bench/asgi.json")
+
+    def handle(self, *args, **options):
+        levels = [max(1, int(level)) for level in options["concurrency"].split(",") if level.strip()]
+        total = max(1, options["requests"])
+
+        with bench.isolated_database():
+            scale = bench.generate_catalog(products=max(1, options["products"]), orders=max(0, options["orders"]))
+            product = Product.objects.filter(is_active=True).order_by("pk").first()
+            category = Category.objects.order_by("pk").first()
+            paths = [
+                "/",
+                "/boutique/",
+                "/boutique/?page=2&tri=prix_asc",
+                "/boutique/?q=chaussettes",
+                f"/categorie/{category.slug}/",
+                f"/produit/{product.slug}/",
+            ]
+
+            results = {"wsgi": {}, "asgi": {}}
+            with override_settings(DEBUG=False, SHOP_METRICS_SAMPLE_RATE=0):
+                for level in levels:
+                    with override_settings(ROOT_URLCONF=_urlconf(False)):
+                        results["wsgi"][f"c{level}"] = self.run_wsgi(paths, total, level)
+                    with override_settings(ROOT_URLCONF=_urlconf(True)):
+                        results["asgi"][f"c{level}"] = asyncio.run(self.run_asgi(paths, total, level))
+                    for mode in ("wsgi", "asgi"):
+                        row = results[mode][f"c{level}"]
+                        self.stdout.write(
+                            f"{mode} c={level:<4} {row['rps']:>8.1f} req/s  "
+                            f"p50 {row['p50_ms']:>8.2f} ms  p95 {row['p95_ms']:>8.2f} ms"
+                        )
+
+            report = {"environment": bench.environment(), "scale": scale, "paths": paths, "results": results}
+
+        bench.write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}."))
+
+    def run_wsgi(self, paths: list[str], total: int, concurrency: int) -> dict[str, float]:
+        def worker(count: int) -> list[float]:
+            client = Client()
+            durations = []
+            for i in range(count):
+                start = time.perf_counter()
+                client.get(paths[i % len(paths)])
+                durations.append((time.perf_counter() - start) * 1000)
+            return durations
+
+        shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            durations = [value for chunk in pool.map(worker, shares) for value in chunk]
+        return _summary(durations, time.perf_counter() - start)
+
+    async def run_asgi(self, paths: list[str], total: int, concurrency: int) -> dict[str, float]:
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        durations: list[float] = []
+
+        async def one(i: int) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                await client.get(paths[i % len(paths)])
+                durations.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return _summary(durations, time.perf_counter() - start)
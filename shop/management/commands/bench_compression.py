@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from shop import bench, compression, exports
+from shop.models import Category, Order, Product
+
+
+def _cpu_ms(call, iterations: int) -> float:
+    call()
+    start = time.process_time()
+    for _ in range(iterations):
+        call()
+    return (time.process_time() - start) * 1000 / iterations
+
+
+class Command(BaseCommand):
+    help = (
+        "Compresse les vraies pages de la boutique (et un export CSV en flux) avec chaque codage disponible: "
+        "octets économisés et temps CPU par requête, par niveau."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--orders", type=int, default=2000)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--levels", default="gzip:1,6,9;br:1,4,9;zstd:1,3,9", help="codage:niveaux;…")
+        parser.add_argument("--output", default="bench/compression.json")
+
+    def handle(self, *args, **options):
+        iterations = max(1, options["iterations"])
+        available = compression.available_encoders()
+        levels = {}
+        for part in options["levels"].split(";"):
+            coding, _, values = part.partition(":")
+            if coding.strip() in available:
+                levels[coding.strip()] = [int(value) for value in values.split(",") if value.strip()]
+
+        with bench.isolated_database():
+            scale = bench.generate_catalog(products=max(1, options["products"]), orders=max(0, options["orders"]))
+            with override_settings(DEBUG=False, SHOP_METRICS_SAMPLE_RATE=0, SHOP_COMPRESSION=False):
+                bodies = self.pages()
+                results = {}
+                for page, (body, streamed) in bodies.items():
+                    size = sum(map(len, body)) if streamed else len(body)
+                    results[page] = {"bytes": size, "streamed": streamed}
+                    for coding, coding_levels in levels.items():
+                        for level in coding_levels:
+                            row = self.measure(coding, level, body, streamed, iterations)
+                            results[page][f"{coding}-{level}"] = row
+                            self.stdout.write(
+                                f"{page:<24} {coding:>4}-{level:<2} {size:>9} → {row['bytes']:>8} o "
+                                f"(-{row['saved_pct']:>5.1f} %)  {row['cpu_ms']:>7.3f} ms CPU"
+                            )
+
+            report = {"environment": bench.environment(), "scale": scale, "levels": levels, "results": results}
+
+        bench.write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}."))
+
+    def pages(self) -> dict[str, tuple[bytes, bool]]:
+        client = Client()
+        product = Product.objects.filter(is_active=True).order_by("-stock", "pk").first()
+        category = Category.objects.filter(products__is_active=True).order_by("pk").first()
+        urls = {
+            "home": reverse("shop:home"),
+            "product_list": reverse("shop:product_list"),
+            "product_list_by_category": reverse("shop:product_list_by_category", args=[category.slug]),
+            "product_detail": reverse("shop:product_detail", args=[product.slug]),
+        }
+        bodies = {name: (client.get(url).content, False) for name, url in urls.items()}
+        client.post(reverse("shop:cart_add", args=[product.pk]), {"quantity": 1})
+        bodies["cart_detail"] = (client.get(reverse("shop:cart_detail")).content, False)
+        bodies["checkout"] = (client.get(reverse("shop:checkout")).content, False)
+        # Flux: les lignes telles que StreamingHttpResponse les envoie.
+        lines = [line.encode() for line in exports.csv_lines(Order.objects.order_by("pk"))]
+        bodies["export_csv"] = (lines, True)
+        return bodies
+
+    def measure(self, coding: str, level: int, body, streamed: bool, iterations: int) -> dict:
+        with override_settings(SHOP_COMPRESSION_LEVELS={coding: level}):
+            if streamed:
+                call = lambda: b"".join(compression.compress_stream(coding, body))  # noqa: E731
+                size = sum(map(len, body))
+            else:
+                call = lambda: compression.compress(coding, body)  # noqa: E731
+                size = len(body)
+            compressed = len(call())
+            cpu_ms = _cpu_ms(call, iterations)
+        return {
+            "bytes": compressed,
+            "saved_pct": round(100 * (1 - compressed / size), 1) if size else 0.0,
+            "cpu_ms": round(cpu_ms, 3),
+        }
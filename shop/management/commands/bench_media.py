@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from types import ModuleType
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import re_path
+from django.views import static
+
+from shop import bench
+from shop.media import serve_media
+
+
+VIEWS = {"static_serve": static.serve, "serve_media": serve_media}
+
+
+def _urlconf(name: str, media_root: str) -> ModuleType:
+    module = ModuleType(f"shop_bench_media_urls_{name}")
+    kwargs = {"document_root": media_root} if name == "static_serve" else {}
+    module.urlpatterns = [re_path(r"^media/(?P<path>.*)$", VIEWS[name], kwargs)]
+    return module
+
+
+def _consume(response) -> int:
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le service des médias par django.views.static.serve (helper static() de DEBUG) et par "
+        "shop.media.serve_media: téléchargement complet, revalidation (ETag, date) et plage d'octets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--large-mb", type=int, default=8, help="Taille du gros fichier synthétique (Mio).")
+        parser.add_argument("--output", default="bench/media.json")
+
+    def handle(self, *args, **options):
+        iterations = max(1, options["iterations"])
+        with tempfile.TemporaryDirectory() as media_root:
+            files = self.prepare(Path(media_root), max(1, options["large_mb"]))
+            sizes = {label: path.stat().st_size for label, path in files.items()}
+            results = {}
+            with override_settings(DEBUG=False, SHOP_METRICS_SAMPLE_RATE=0, MEDIA_ROOT=media_root):
+                for view in VIEWS:
+                    with override_settings(ROOT_URLCONF=_urlconf(view, media_root)):
+                        results[view] = self.run_view(files, iterations)
+                    for name, row in results[view].items():
+                        throughput = f"  {row['mb_per_s']:>8.1f} Mio/s" if "mb_per_s" in row else ""
+                        self.stdout.write(
+                            f"{view:<13} {name:<28} {row['status']}  p50 {row['p50_ms']:>8.3f} ms  "
+                            f"p95 {row['p95_ms']:>8.3f} ms  {row['bytes']:>9} o{throughput}"
+                        )
+
+        report = {"environment": bench.environment(), "files": sizes, "results": results}
+        bench.write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}."))
+
+    def prepare(self, root: Path, large_mb: int) -> dict[str, Path]:
+        (root / "products").mkdir()
+        images = sorted(Path(settings.MEDIA_ROOT).glob("products/*.jpeg"), key=lambda path: path.stat().st_size)
+        files = {}
+        if images:
+            files["image"] = root / "products" / images[len(images) // 2].name
+            shutil.copyfile(images[len(images) // 2], files["image"])
+        files["large"] = root / "products" / "bench-large.bin"
+        with files["large"].open("wb") as handle:
+            for _ in range(large_mb):
+                handle.write(os.urandom(1024 * 1024))
+        return files
+
+    def run_view(self, files: dict[str, Path], iterations: int) -> dict[str, dict]:
+        client = Client()
+        rows = {}
+        for label, path in files.items():
+            url = f"/media/products/{path.name}"
+            first = client.get(url)
+            _consume(first)
+            size = path.stat().st_size
+            scenarios = {
+                f"{label}_full": {},
+                f"{label}_if_none_match": {"If-None-Match": first.get("ETag", '"absent"')},
+                f"{label}_if_modified_since": {"If-Modified-Since": first["Last-Modified"]},
+                f"{label}_range_64k": {"Range": f"bytes={size // 2}-{size // 2 + 65535}"},
+            }
+            for name, headers in scenarios.items():
+                outcome = {}
+
+                def call(url=url, headers=headers, outcome=outcome):
+                    response = client.get(url, headers=headers)
+                    outcome["status"], outcome["bytes"] = response.status_code, _consume(response)
+
+                row = bench.measure(call, iterations)
+                row.update(outcome)
+                if outcome["bytes"] and row["mean_ms"]:
+                    row["mb_per_s"] = round(outcome["bytes"] / 1024 / 1024 / (row["mean_ms"] / 1000), 1)
+                rows[name] = row
+        return rows
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from shop import bench
+from shop.models import Category, Order, Product
+
+
+CHECKOUT_FORM = {
+    "customer_name": "Client Bench",
+    "customer_phone": "+221 77 000 00 00",
+    "address": "Rue du test",
+    "city": "Dakar",
+    "payment_method": Order.PaymentMethod.CASH,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un catalogue et des commandes synthétiques dans une base jetable, "
+        "puis mesure chaque vue de la boutique (p50/p95, requêtes SQL, pic mémoire)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=10_000)
+        parser.add_argument("--orders", type=int, default=10_000)
+        parser.add_argument("--categories", type=int, default=12)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", default="bench/shop.json", help="Fichier JSON des résultats.")
+        parser.add_argument(
+            "--database-name", default=None, help="Nom (ou fichier SQLite) de la base jetable. Défaut: celui des tests."
+        )
+
+    def handle(self, *args, **options):
+        iterations = max(1, options["iterations"])
+        with bench.isolated_database(options["database_name"]):
+            self.stdout.write(self.style.MIGRATE_HEADING("Génération du catalogue synthétique…"))
+            scale = bench.generate_catalog(
+                products=max(1, options["products"]),
+                orders=max(0, options["orders"]),
+                categories=max(1, options["categories"]),
+                batch_size=max(1, options["batch_size"]),
+                seed=options["seed"],
+            )
+            # Ni journal SQL de DEBUG ni métriques échantillonnées: ils fausseraient les mesures.
+            with override_settings(DEBUG=False, SHOP_METRICS_SAMPLE_RATE=0):
+                results = {}
+                for name, call, setup in self.scenarios():
+                    results[name] = bench.measure(call, iterations, setup)
+                    row = results[name]
+                    self.stdout.write(
+                        f"{name:<28} p50 {row['p50_ms']:>9.2f} ms  p95 {row['p95_ms']:>9.2f} ms  "
+                        f"{row['queries']:>4} req.  {row['peak_kb']:>9.1f} Kio"
+                    )
+
+            report = {"environment": bench.environment(), "scale": scale, "results": results}
+
+        bench.write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}."))
+
+    def scenarios(self):
+        products = list(Product.objects.filter(is_active=True).order_by("-stock", "pk")[:3])
+        product = products[0]
+        category = Category.objects.filter(products__is_active=True).order_by("pk").first()
+        middle_page = max(1, Product.objects.filter(is_active=True).count() // 12 // 2)
+
+        client = Client()
+        staff = Client()
+        staff.force_login(
+            get_user_model().objects.create_superuser("bench", "bench@example.com", "bench")
+        )
+
+        def get(target, url, params=None):
+            return lambda: target.get(url, params)
+
+        def add_product():
+            client.post(reverse("shop:cart_add", args=[product.pk]), {"quantity": 1})
+
+        def fill_cart():
+            for item in products:
+                client.post(reverse("shop:cart_add", args=[item.pk]), {"quantity": 1})
+
+        def last_order():
+            order_id = client.session.get("last_order_id")
+            return lambda: client.get(reverse("shop:checkout_success", args=[order_id]))
+
+        product_list = reverse("shop:product_list")
+        yield "home", get(client, reverse("shop:home")), None
+        yield "product_list", get(client, product_list), None
+        yield "product_list_deep_page", get(client, product_list, {"page": middle_page}), None
+        yield "product_list_price_sort", get(client, product_list, {"tri": "prix_asc"}), None
+        yield "product_list_search", get(client, product_list, {"q": "chaussettes noir"}), None
+        yield (
+            "product_list_by_category",
+            get(client, reverse("shop:product_list_by_category", args=[category.slug])),
+            None,
+        )
+        yield "product_detail", get(client, reverse("shop:product_detail", args=[product.slug])), None
+        yield "cart_add", add_product, None
+        yield "cart_remove", lambda: client.post(reverse("shop:cart_remove", args=[product.pk])), add_product
+        fill_cart()
+        yield "cart_detail", get(client, reverse("shop:cart_detail")), None
+        yield "checkout", get(client, reverse("shop:checkout")), None
+        yield "checkout_submit", lambda: client.post(reverse("shop:checkout"), CHECKOUT_FORM), fill_cart
+        yield "checkout_success", last_order(), None
+        yield "metrics", get(staff, reverse("shop:metrics")), None
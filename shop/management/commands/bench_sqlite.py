@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from shop import bench
+from shop.models import Order, Product
+
+from .bench_shop import CHECKOUT_FORM
+
+
+PROFILES = {"defaut": "0", "production": "1"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Checkouts concurrents sur une base SQLite fichier, avec et sans le profil de production "
+        "(SHOP_SQLITE_PRODUCTION): débit, latences p50/p95/p99 et échecs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--checkouts", type=int, default=400, help="Checkouts au total, par profil.")
+        parser.add_argument("--products", type=int, default=200)
+        parser.add_argument("--output", default="bench/sqlite.json")
+        # Interne: un profil par processus, car le moteur et ses options se lisent au démarrage.
+        parser.add_argument("--run-profile", choices=sorted(PROFILES), help="(interne)")
+        parser.add_argument("--result-file", help="(interne)")
+
+    def handle(self, *args, **options):
+        if options["run_profile"]:
+            self.run_profile(options)
+            return
+
+        results = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            for profile, flag in PROFILES.items():
+                result_file = Path(tmp) / f"{profile}.json"
+                command = [
+                    sys.executable,
+                    str(settings.BASE_DIR / "manage.py"),
+                    "bench_sqlite",
+                    f"--run-profile={profile}",
+                    f"--result-file={result_file}",
+                    f"--threads={options['threads']}",
+                    f"--checkouts={options['checkouts']}",
+                    f"--products={options['products']}",
+                ]
+                env = {**os.environ, "SHOP_SQLITE_PRODUCTION": flag}
+                if subprocess.run(command, env=env).returncode != 0:
+                    raise CommandError(f"Échec du profil {profile}.")
+                results[profile] = json.loads(result_file.read_text(encoding="utf-8"))
+                row = results[profile]
+                self.stdout.write(
+                    f"{profile:<11} {row['checkouts_per_s']:>7.1f} checkouts/s  p50 {row['p50_ms']:>8.2f} ms  "
+                    f"p95 {row['p95_ms']:>8.2f} ms  p99 {row['p99_ms']:>8.2f} ms  échecs {row['failures']}"
+                )
+
+        report = {
+            "environment": bench.environment(),
+            "threads": options["threads"],
+            "checkouts": options["checkouts"],
+            "results": results,
+        }
+        bench.write_report(options["output"], report)
+        self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}."))
+
+    def run_profile(self, options):
+        threads = max(1, options["threads"])
+        total = max(1, options["checkouts"])
+        with tempfile.TemporaryDirectory() as tmp, bench.isolated_database(str(Path(tmp) / "bench.sqlite3")):
+            bench.generate_catalog(products=max(1, options["products"]), orders=0)
+            Product.objects.update(stock=1_000_000)
+            product_ids = list(Product.objects.values_list("pk", flat=True))
+            # Les threads ouvrent leur propre connexion: libérer celle-ci évite de garder un verrou.
+            connection.close()
+
+            durations: list[float] = []
+            failures = 0
+            lock = threading.Lock()
+
+            def worker(index: int) -> None:
+                nonlocal failures
+                client = Client(raise_request_exception=False)
+                for i in range(index, total, threads):
+                    product_id = product_ids[i % len(product_ids)]
+                    client.post(reverse("shop:cart_add", args=[product_id]), {"quantity": 1})
+                    start = time.perf_counter()
+                    response = client.post(reverse("shop:checkout"), CHECKOUT_FORM)
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        if response.status_code == 302 and "/merci/" in response["Location"]:
+                            durations.append(elapsed)
+                        else:
+                            failures += 1
+                connections.close_all()
+
+            with override_settings(DEBUG=False, SHOP_METRICS_SAMPLE_RATE=0):
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+                    list(pool.map(worker, range(threads)))
+                elapsed = time.perf_counter() - start
+
+            result = {
+                "orders": Order.objects.count(),
+                "failures": failures,
+                "checkouts_per_s": round(len(durations) / elapsed, 1),
+                "p50_ms": round(bench.percentile(durations, 50), 3),
+                "p95_ms": round(bench.percentile(durations, 95), 3),
+                "p99_ms": round(bench.percentile(durations, 99), 3),
+            }
+        Path(options["result_file"]).write_text(json.dumps(result), encoding="utf-8")
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from shop import catalog, derivatives
+from shop.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = "Génère les dérivés (largeurs réduites, WebP) des images produit, en parallèle."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--force", action="store_true", help="Régénère aussi les images déjà traitées.")
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        force = options["force"]
+        batch_size = max(1, options["batch_size"])
+        media_root = str(settings.MEDIA_ROOT)
+
+        pending = []
+        for image in ProductImage.objects.only("id", "image", "derivatives").order_by("pk").iterator():
+            if image.image and (force or not image.derivatives):
+                try:
+                    path = image.image.storage.path(image.image.name)
+                except NotImplementedError:
+                    # Les workers lisent et écrivent des fichiers locaux (MEDIA_ROOT).
+                    raise CommandError(
+                        "Le stockage des images n'expose pas de chemin local: dérivés impossibles à générer ici."
+                    ) from None
+                pending.append((image.pk, path, image.image.name))
+
+        if not pending:
+            self.stdout.write(self.style.SUCCESS("Aucune image à traiter."))
+            return
+
+        done: list[ProductImage] = []
+        failed = 0
+        with ProcessPoolExecutor(max_workers=max(1, options["workers"])) as executor:
+            futures = {
+                executor.submit(derivatives.build, path, media_root, name): pk for pk, path, name in pending
+            }
+            for future in as_completed(futures):
+                pk = futures[future]
+                try:
+                    produced = future.result()
+                except (OSError, ValueError) as exc:
+                    failed += 1
+                    self.stderr.write(f"Image #{pk}: {exc}")
+                    continue
+
+                done.append(ProductImage(pk=pk, derivatives=produced))
+                if len(done) >= batch_size:
+                    ProductImage.objects.bulk_update(done, ["derivatives"])
+                    done = []
+
+        ProductImage.objects.bulk_update(done, ["derivatives"])
+        catalog.invalidate()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Dérivés générés: {len(pending) - failed} image(s), {failed} échec(s).")
+        )
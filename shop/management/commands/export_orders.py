@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop import exports
+from shop.models import Order
+
+
+class Command(BaseCommand):
+    help = "Exporte les commandes filtrées et leurs lignes en CSV ou JSONL (en flux, mémoire constante)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(exports.FORMATS), default="csv")
+        parser.add_argument("--since", type=date.fromisoformat, help="Date de début incluse (AAAA-MM-JJ).")
+        parser.add_argument("--until", type=date.fromisoformat, help="Date de fin incluse (AAAA-MM-JJ).")
+        parser.add_argument("--status", action="append", choices=Order.Status.values, help="Répétable.")
+        parser.add_argument("--output", help="Fichier de sortie. Défaut: sortie standard.")
+        parser.add_argument("--chunk-size", type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        orders = Order.objects.order_by("pk")
+        if options["since"]:
+            orders = orders.filter(created_at__date__gte=options["since"])
+        if options["until"]:
+            orders = orders.filter(created_at__date__lte=options["until"])
+        if options["status"]:
+            orders = orders.filter(status__in=options["status"])
+
+        lines = exports.export_lines(orders, options["format"], max(1, options["chunk_size"]))
+        if not options["output"]:
+            for line in lines:
+                sys.stdout.write(line)
+            return
+
+        try:
+            with open(options["output"], "w", encoding="utf-8", newline="") as handle:
+                handle.writelines(lines)
+        except OSError as exc:
+            raise CommandError(str(exc)) from exc
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from shop import importer
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe catégories et produits depuis des fichiers JSON, JSONL ou CSV (lecture en flux), "
+        "par lots bulk_create/bulk_update comparés sur le slug."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", help="Fichier de catégories. Défaut: data/categories.json.")
+        parser.add_argument("--products", help="Fichier de produits. Défaut: data/products.json.")
+        parser.add_argument("--format", choices=["json", "jsonl", "csv"], help="Sinon, déduit de l'extension.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        categories_path = options["categories"]
+        products_path = options["products"]
+        if not categories_path and not products_path:
+            data_dir = settings.BASE_DIR / "data"
+            categories_path = str(data_dir / "categories.json")
+            products_path = str(data_dir / "products.json")
+
+        batch_size = max(1, options["batch_size"])
+        refs: dict[str, int] = {}
+        try:
+            if categories_path:
+                stats, refs = importer.import_categories(
+                    importer.read_records(categories_path, options["format"]), batch_size
+                )
+                self.report("Catégories", stats)
+            if products_path:
+                stats = importer.import_products(
+                    importer.read_records(products_path, options["format"]), refs, batch_size
+                )
+                self.report("Produits", stats)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc)) from exc
+
+    def report(self, label: str, stats: importer.ImportStats) -> None:
+        for error in stats.errors:
+            self.stdout.write(self.style.WARNING(f"{label}: {error}"))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{label}: {stats.inserted} insérée(s), {stats.updated} mise(s) à jour, "
+                f"{stats.unchanged} inchangée(s), {stats.skipped} ignorée(s)."
+            )
+        )
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Traite les messages sortants (e-mails de commande, alertes de stock) par lots, avec réessais "
+        "espacés. Tourne en continu; --once pour un seul passage (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--interval", type=float, default=2.0, help="Attente (secondes) quand rien n'est dû.")
+        parser.add_argument("--once", action="store_true", help="Vide les messages dus puis s'arrête.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        succeeded = failed = 0
+        try:
+            while True:
+                done, errors = outbox.run_once(batch_size)
+                succeeded, failed = succeeded + done, failed + errors
+                if done + errors == 0:
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"{succeeded} message(s) traité(s), {failed} en échec."))
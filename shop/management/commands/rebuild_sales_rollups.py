@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop import reporting
+
+
+class Command(BaseCommand):
+    help = "Recalcule les ventes par jour (DailySales) depuis les commandes, sur toute la période ou une plage."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=date.fromisoformat, help="Premier jour inclus (AAAA-MM-JJ).")
+        parser.add_argument("--until", type=date.fromisoformat, help="Dernier jour inclus (AAAA-MM-JJ).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        since, until = options["since"], options["until"]
+        if since and until and since > until:
+            raise CommandError("--since doit précéder --until.")
+
+        created = reporting.rebuild(since, until, max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Ventes par jour recalculées: {created} ligne(s)."))
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shop import search
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte des produits (SQLite FTS5)."
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            self.stdout.write(
+                self.style.WARNING("Index plein texte indisponible sur cette base: recherche par icontains.")
+            )
+            return
+
+        with transaction.atomic():
+            count = search.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(f"Index de recherche reconstruit: {count} produit(s)."))
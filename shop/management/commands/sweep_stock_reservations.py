@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from shop import inventory
+
+
+class Command(BaseCommand):
+    help = "Supprime les réservations de stock expirées, par lots."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = inventory.sweep_expired(batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"{deleted} réservation(s) expirée(s) supprimée(s)."))
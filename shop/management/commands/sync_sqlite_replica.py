@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from shop.routers import REPLICA_ALIAS, has_replica
+
+
+class Command(BaseCommand):
+    help = (
+        "Copie la base SQLite primaire dans le réplica SQLite (DJANGO_DB_REPLICA_NAME), pour essayer "
+        "le routage lecture/écriture en local. À relancer pour « rattraper » le réplica."
+    )
+
+    def handle(self, *args, **options):
+        if not has_replica():
+            raise CommandError("Aucun réplica configuré (DJANGO_DB_REPLICA_NAME).")
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[REPLICA_ALIAS]
+        if primary.vendor != "sqlite" or replica.vendor != "sqlite":
+            raise CommandError("Copie possible seulement entre deux bases SQLite; ailleurs, utiliser la réplication du SGBD.")
+        if str(primary.settings_dict["NAME"]) == str(replica.settings_dict["NAME"]):
+            raise CommandError("Le réplica et le primaire désignent le même fichier.")
+
+        replica.close()
+        # API de sauvegarde en ligne: copie cohérente même si le primaire reçoit des écritures.
+        source = sqlite3.connect(primary.settings_dict["NAME"])
+        target = sqlite3.connect(replica.settings_dict["NAME"])
+        try:
+            with target:
+                source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        self.stdout.write(self.style.SUCCESS(f"Réplica copié dans {replica.settings_dict['NAME']}."))
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+# Service des fichiers sans proxy devant Django: validateurs forts, requêtes conditionnelles et
+# plages d'octets. FileResponse passe le fichier au ``wsgi.file_wrapper`` du serveur (os.sendfile
+# sous gunicorn): les octets ne transitent pas par Python.
+
+# Nom contenant un hash du contenu (ex. ``logo.3f2a9c81b0d4.png``, ManifestStaticFilesStorage).
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.[^./]+$")
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+BLOCK_SIZE = 64 * 1024
+
+# Variantes écrites par collectstatic (shop.storage), par ordre de préférence.
+PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+
+class FileRange:
+    """Fichier lu seulement sur ``[start, start + length)``; ``fileno()`` reste disponible pour sendfile."""
+
+    def __init__(self, file, start: int, length: int):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        data = self.file.read(self.remaining if size < 0 else min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def seek(self, *args) -> int:
+        return self.file.seek(*args)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def file_etag(stat) -> str:
+    # Taille + date de modification à la nanoseconde: change avec tout remplacement du fichier.
+    return quote_etag(f"{stat.st_size:x}-{stat.st_mtime_ns:x}")
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Plage ``bytes=`` unique → (début, fin incluse). ``None``: en-tête ignoré (réponse complète).
+
+    Lève ``ValueError`` si la plage est hors du fichier (416).
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        # Plusieurs plages: la réponse complète est permise et bien plus simple.
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # bytes=-N: les N derniers octets.
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise ValueError("plage hors du fichier")
+    if start < 0 or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _range_applies(request: HttpRequest, etag: str, mtime: float) -> bool:
+    # If-Range: la plage ne vaut que pour la version du fichier que le client a déjà en partie.
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith(('"', "W/")):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Codages acceptés (q > 0) d'un en-tête Accept-Encoding."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _precompressed(request: HttpRequest, fullpath: Path) -> tuple[Path, str | None, bool]:
+    """Variante précompressée à servir (fichier, Content-Encoding) et présence d'au moins une variante."""
+    siblings = [
+        (coding, fullpath.with_name(fullpath.name + suffix)) for coding, suffix in PRECOMPRESSED_SUFFIXES
+    ]
+    siblings = [(coding, sibling) for coding, sibling in siblings if sibling.is_file()]
+    accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    for coding, sibling in siblings:
+        if coding in accepted:
+            return sibling, coding, True
+    return fullpath, None, bool(siblings)
+
+
+def serve_file(
+    request: HttpRequest, document_root, path: str, max_age: int = 0, precompressed: bool = False
+) -> HttpResponse:
+    """``precompressed``: sert ``<fichier>.br`` ou ``.gz`` si le client l'accepte (aucune compression ici)."""
+    path = posixpath.normpath(path).lstrip("/")
+    try:
+        fullpath = Path(safe_join(document_root, path))
+    except SuspiciousFileOperation:
+        raise Http404("Fichier introuvable.") from None
+    try:
+        stat = fullpath.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("Fichier introuvable.") from None
+    if not fullpath.is_file():
+        raise Http404("Fichier introuvable.")
+
+    content_type, encoding = mimetypes.guess_type(fullpath.name)
+    content_type = content_type or "application/octet-stream"
+    served, varies = fullpath, False
+    if precompressed and encoding is None:
+        served, encoding, varies = _precompressed(request, fullpath)
+        if served is not fullpath:
+            stat = served.stat()
+
+    # Une variante compressée a son propre ETag (ses propres octets).
+    etag = file_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+
+    def finish(response: HttpResponse) -> HttpResponse:
+        response["ETag"] = etag
+        response["Last-Modified"] = last_modified
+        response["Accept-Ranges"] = "bytes"
+        if varies:
+            patch_vary_headers(response, ["Accept-Encoding"])
+        if HASHED_NAME.search(fullpath.name):
+            patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=max_age)
+        return response
+
+    # If-None-Match / If-Modified-Since (304) et If-Match / If-Unmodified-Since (412).
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if conditional is not None:
+        return finish(conditional)
+
+    byte_range = None
+    range_header = request.META.get("HTTP_RANGE")
+    if range_header and request.method in ("GET", "HEAD") and _range_applies(request, etag, stat.st_mtime):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return finish(response)
+
+    file = served.open("rb")
+    if byte_range is not None:
+        start, end = byte_range
+        file = FileRange(file, start, end - start + 1)
+    # Nom d'origine, même pour une variante .br/.gz.
+    response = FileResponse(file, content_type=content_type, filename=fullpath.name)
+    if byte_range is not None:
+        response.status_code = 206
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    response.block_size = BLOCK_SIZE
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return finish(response)
+
+
+def serve_media(request: HttpRequest, path: str) -> HttpResponse:
+    """MEDIA_URL servi par Django (DEBUG, ou SHOP_SERVE_MEDIA en production sans proxy)."""
+    return serve_file(request, settings.MEDIA_ROOT, path, getattr(settings, "SHOP_MEDIA_MAX_AGE", 3600))
+
+
+def serve_static(request: HttpRequest, path: str) -> HttpResponse:
+    """STATIC_URL servi depuis STATIC_ROOT (SHOP_SERVE_STATIC): variantes .br/.gz de collectstatic."""
+    return serve_file(
+        request, settings.STATIC_ROOT, path, getattr(settings, "SHOP_STATIC_MAX_AGE", 3600), precompressed=True
+    )
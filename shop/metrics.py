@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+METRICS = {
+    "shop_request_duration_seconds": ("Durée totale de la requête.", LATENCY_BUCKETS),
+    "shop_db_queries": ("Nombre de requêtes SQL par requête HTTP.", QUERY_BUCKETS),
+    "shop_db_duration_seconds": ("Temps passé dans la base de données.", LATENCY_BUCKETS),
+    "shop_template_render_seconds": ("Temps de rendu des templates.", LATENCY_BUCKETS),
+}
+
+# Au-delà, les vues inconnues sont regroupées: la mémoire reste bornée.
+MAX_VIEWS = 100
+OTHER_VIEW = "other"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views: dict[str, dict[str, Histogram]] = {}
+
+    def observe(self, view: str, values: dict[str, float]) -> None:
+        with self._lock:
+            histograms = self._views.get(view)
+            if histograms is None:
+                if len(self._views) >= MAX_VIEWS:
+                    view = OTHER_VIEW
+                histograms = self._views.setdefault(
+                    view, {name: Histogram(buckets) for name, (_, buckets) in METRICS.items()}
+                )
+            for name, value in values.items():
+                histograms[name].observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._views.clear()
+
+    def render(self) -> str:
+        """Format texte d'exposition Prometheus."""
+        lines = []
+        with self._lock:
+            for name, (help_text, _) in METRICS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for view in sorted(self._views):
+                    histogram = self._views[view][name]
+                    label = view.replace("\\", "\\\\").replace('"', '\\"')
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{view="{label}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{view="{label}"}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{view="{label}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class RequestTimings:
+    __slots__ = ("queries", "db_seconds", "template_seconds", "template_depth")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper: chronomètre chaque requête SQL.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.queries += 1
+
+    def wrap_databases(self, stack: ExitStack) -> None:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+
+
+current_timings: contextvars.ContextVar[RequestTimings | None] = contextvars.ContextVar(
+    "shop_request_timings", default=None
+)
+
+
+@contextmanager
+def template_render():
+    """Chronomètre un rendu de template (moteur ``shop.backends.templates``); seul le plus externe compte."""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    timings.template_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.template_depth -= 1
+        if timings.template_depth == 0:
+            timings.template_seconds += time.perf_counter() - start
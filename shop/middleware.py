@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject, empty
+
+from . import cart, compression, metrics, routers
+
+
+class CartMiddleware:
+    """Expose ``request.cart`` (chargé à la demande) et l'enregistre s'il a été modifié."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.storage = cart.get_storage()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        request.cart = SimpleLazyObject(lambda: self.storage.load(request))
+        response = self.get_response(request)
+
+        state = request.cart
+        if state._wrapped is not empty and state.modified:
+            self.storage.save(request, response, state._wrapped)
+        return response
+
+    async def __acall__(self, request):
+        request.cart = SimpleLazyObject(lambda: self.storage.load(request))
+        response = await self.get_response(request)
+
+        state = request.cart
+        if state._wrapped is not empty and state.modified:
+            await sync_to_async(self.storage.save)(request, response, state._wrapped)
+        return response
+
+
+class MetricsMiddleware:
+    """Mesure, sur un échantillon de requêtes, latence, requêtes SQL, temps SQL et rendu par vue."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "SHOP_METRICS_SAMPLE_RATE", 0.1)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        timings = metrics.RequestTimings()
+        token = metrics.current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                timings.wrap_databases(stack)
+                response = self.get_response(request)
+        finally:
+            metrics.current_timings.reset(token)
+
+        self._observe(request, timings, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        timings = metrics.RequestTimings()
+        token = metrics.current_timings.set(timings)
+        start = time.perf_counter()
+        # Les connexions sont propres au thread: les wrappers se posent dans celui de l'ORM asynchrone.
+        stack = ExitStack()
+        await sync_to_async(timings.wrap_databases)(stack)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            metrics.current_timings.reset(token)
+
+        self._observe(request, timings, time.perf_counter() - start)
+        return response
+
+    def _observe(self, request, timings: metrics.RequestTimings, duration: float) -> None:
+        match = getattr(request, "resolver_match", None)
+        metrics.registry.observe(
+            match.view_name if match else "unresolved",
+            {
+                "shop_request_duration_seconds": duration,
+                "shop_db_queries": timings.queries,
+                "shop_db_duration_seconds": timings.db_seconds,
+                "shop_template_render_seconds": timings.template_seconds,
+            },
+        )
+
+
+class PrimaryDatabaseMiddleware:
+    """Envoie au primaire toutes les lectures des requêtes d'écriture (POST…) et de l'admin."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _pin(self, request) -> bool:
+        return routers.has_replica() and (
+            request.method not in ("GET", "HEAD", "OPTIONS") or request.path_info.startswith("/admin/")
+        )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._pin(request):
+            return self.get_response(request)
+        with routers.use_primary():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not self._pin(request):
+            return await self.get_response(request)
+        with routers.use_primary():
+            return await self.get_response(request)
+
+
+class CompressionMiddleware:
+    """Compresse HTML, JSON, CSV… selon Accept-Encoding (brotli, zstd si installés, sinon gzip).
+
+    Contrairement à GZipMiddleware, une réponse en flux reste un flux: chaque morceau est compressé et
+    envoyé aussitôt. Les fichiers (FileResponse) ne sont pas touchés: ils ont leurs variantes précompressées.
+    Les jetons CSRF sont masqués à chaque requête (pas de secret répété d'une page à l'autre, cf. BREACH).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "SHOP_COMPRESSION", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.min_size = getattr(settings, "SHOP_COMPRESSION_MIN_SIZE", 512)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process(request, await self.get_response(request))
+
+    def _coding(self, request, response) -> str | None:
+        if (
+            isinstance(response, FileResponse)
+            or response.status_code != 200
+            or response.has_header("Content-Encoding")
+            or "no-transform" in response.get("Cache-Control", "")
+            or not compression.COMPRESSIBLE_TYPES.match(response.get("Content-Type", ""))
+        ):
+            return None
+        if not response.streaming and len(response.content) < self.min_size:
+            return None
+        return compression.negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+
+    def process(self, request, response):
+        # Le corps dépend de l'en-tête, même quand on ne compresse pas.
+        if response.has_header("Content-Type") and compression.COMPRESSIBLE_TYPES.match(response["Content-Type"]):
+            patch_vary_headers(response, ("Accept-Encoding",))
+        coding = self._coding(request, response)
+        if coding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.acompress_stream(coding, response.streaming_content)
+            else:
+                response.streaming_content = compression.compress_stream(coding, response.streaming_content)
+            del response["Content-Length"]
+        else:
+            compressed = compression.compress(coding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # Le corps transmis n'est plus celui de l'ETag: validateur faible (comme GZipMiddleware).
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = coding
+        return response
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+FTS_TABLE = "shop_product_fts"
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "name, description, category, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE}(rowid, name, description, category) "
+        "SELECT p.id, p.name, p.description, c.name FROM shop_product p "
+        "INNER JOIN shop_category c ON c.id = p.category_id"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shop", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.28 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0002_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'created_at', 'id'], name='shop_product_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'price_xof', 'id'], name='shop_product_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'name', 'id'], name='shop_product_name_idx'),
+        ),
+    ]
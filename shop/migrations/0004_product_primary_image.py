@@ -0,0 +1,40 @@
+# Generated by Django 4.2.28 on 2026-10-18 09:41
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def set_primary_images(apps, schema_editor):
+    Product = apps.get_model("shop", "Product")
+    ProductImage = apps.get_model("shop", "ProductImage")
+    first_image = (
+        ProductImage.objects.filter(product=OuterRef("pk")).order_by("sort_order", "id").values("pk")[:1]
+    )
+    Product.objects.update(primary_image=Subquery(first_image))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0003_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, editable=False, help_text="Première image (ordre d'affichage), maintenue automatiquement.", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='shop.productimage'),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(set_primary_images, migrations.RunPython.noop),
+    ]
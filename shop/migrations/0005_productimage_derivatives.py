@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-18 09:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0004_product_primary_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Largeurs générées par format (jpeg, webp).'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.28 on 2026-10-18 09:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0005_productimage_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cart_token', models.CharField(max_length=32)),
+                ('quantity', models.PositiveIntegerField()),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='shop.product')),
+            ],
+            options={
+                'verbose_name': 'Réservation de stock',
+                'verbose_name_plural': 'Réservations de stock',
+                'indexes': [models.Index(fields=['product', 'expires_at'], name='shop_reservation_active_idx'), models.Index(fields=['expires_at'], name='shop_reservation_expiry_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stockreservation',
+            constraint=models.UniqueConstraint(fields=('cart_token', 'product'), name='shop_reservation_cart_product_uniq'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.28 on 2026-10-18 09:59
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def normalize_phone(value):
+    # Copie figée de shop.models.normalize_phone au moment de cette migration.
+    digits = "".join(char for char in value or "" if char.isdigit())
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if len(digits) == 9:
+        digits = f"221{digits}"
+    return digits[:20]
+
+
+def backfill_phones(apps, schema_editor):
+    Order = apps.get_model("shop", "Order")
+    last_pk = 0
+    while True:
+        batch = list(Order.objects.filter(pk__gt=last_pk).order_by("pk").only("pk", "customer_phone")[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        for order in batch:
+            order.customer_phone_normalized = normalize_phone(order.customer_phone)
+        Order.objects.bulk_update(batch, ["customer_phone_normalized"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0006_stock_reservation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='customer_phone_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Chiffres seuls, indicatif 221 inclus.', max_length=20),
+        ),
+        migrations.RunPython(backfill_phones, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.28 on 2026-10-18 09:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0007_order_customer_phone_normalized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('payment_method', models.CharField(choices=[('cash', 'Paiement à la livraison'), ('orange_money', 'Orange Money'), ('wave', 'Wave')], max_length=20)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue_xof', models.BigIntegerField(default=0)),
+                ('order_count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='shop.category')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='shop.product')),
+            ],
+            options={
+                'verbose_name': 'Ventes du jour',
+                'verbose_name_plural': 'Ventes par jour',
+                'ordering': ['-day', 'category', 'product'],
+                'indexes': [models.Index(fields=['category', 'day'], name='shop_daily_sales_category_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailysales',
+            constraint=models.UniqueConstraint(fields=('day', 'product', 'category', 'payment_method'), name='shop_daily_sales_uniq'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.28 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0008_daily_sales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=60)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('done', 'Traité'), ('failed', 'Abandonné')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('available_at', models.DateTimeField(help_text='Pas de traitement avant cette date (réessais espacés).')),
+                ('locked_until', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('lock_token', models.CharField(blank=True, editable=False, max_length=32)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Message sortant',
+                'verbose_name_plural': 'Messages sortants',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'available_at', 'id'], name='shop_outbox_due_idx')],
+            },
+        ),
+    ]
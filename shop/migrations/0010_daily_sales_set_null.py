@@ -0,0 +1,24 @@
+# Generated by Django 4.2.28 on 2026-10-18 10:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0009_outbox_message'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailysales',
+            name='category',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='shop.category'),
+        ),
+        migrations.AlterField(
+            model_name='dailysales',
+            name='product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='shop.product'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.28 on 2026-10-18 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0010_daily_sales_set_null'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='shop_product_recent_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='shop_product_price_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='shop_product_name_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='shop_product_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['price_xof', 'id'], name='shop_product_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['name', 'id'], name='shop_product_name_idx'),
+        ),
+    ]
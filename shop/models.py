@@ -1,4 +1,8 @@
+from __future__ import annotations
+
+from django.core.files.images import get_image_dimensions
 from django.db import models
+from django.db.models import Q
 from django.utils.text import slugify
 
 
@@ -34,6 +38,15 @@ class Product(models.Model):
     )
     stock = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    primary_image = models.ForeignKey(
+        "ProductImage",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Première image (ordre d'affichage), maintenue automatiquement.",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -41,6 +54,13 @@ class Product(models.Model):
         verbose_name = "Produit"
         verbose_name_plural = "Produits"
         ordering = ["-created_at"]
+        indexes = [
+            # Pagination par curseur: (tri, id) pour chaque ordre de la boutique. Index partiels: Django
+            # écrit ``WHERE "is_active"`` (sans ``= 1``), qu'un index (is_active, ...) ne sert pas sous SQLite.
+            models.Index(fields=["created_at", "id"], name="shop_product_recent_idx", condition=Q(is_active=True)),
+            models.Index(fields=["price_xof", "id"], name="shop_product_price_idx", condition=Q(is_active=True)),
+            models.Index(fields=["name", "id"], name="shop_product_name_idx", condition=Q(is_active=True)),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -52,10 +72,8 @@ class Product(models.Model):
 
     @property
     def main_image(self):
-        prefetched_images = getattr(self, "_prefetched_objects_cache", {}).get("images")
-        if prefetched_images is not None:
-            return prefetched_images[0] if prefetched_images else None
-        return self.images.order_by("sort_order", "id").first()
+        # Utiliser select_related("primary_image") dans les listes.
+        return self.primary_image if self.primary_image_id else None
 
 
 class ProductImage(models.Model):
@@ -63,6 +81,11 @@ class ProductImage(models.Model):
     image = models.ImageField(upload_to="products/")
     alt_text = models.CharField(max_length=180, blank=True)
     sort_order = models.PositiveIntegerField(default=0)
+    width = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    height = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    derivatives = models.JSONField(
+        default=dict, blank=True, editable=False, help_text="Largeurs générées par format (jpeg, webp)."
+    )
 
     class Meta:
         verbose_name = "Image produit"
@@ -72,6 +95,47 @@ class ProductImage(models.Model):
     def __str__(self) -> str:
         return f"{self.product.name} (#{self.sort_order})"
 
+    def save(self, *args, **kwargs):
+        new_upload = self.image and not getattr(self.image, "_committed", True)
+        if self.image and (new_upload or self.width is None):
+            self.width, self.height = read_dimensions(self.image)
+        if new_upload:
+            self.derivatives = {}
+        super().save(*args, **kwargs)
+
+
+def read_dimensions(image) -> tuple[int | None, int | None]:
+    # Un fichier déjà enregistré est refermé; un upload en cours reste ouvert pour la sauvegarde.
+    try:
+        width, height = get_image_dimensions(image, close=getattr(image, "_committed", True))
+    except (OSError, ValueError):
+        return None, None
+    return width, height
+
+
+class StockReservation(models.Model):
+    product = models.ForeignKey(Product, related_name="reservations", on_delete=models.CASCADE)
+    cart_token = models.CharField(max_length=32)
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Réservation de stock"
+        verbose_name_plural = "Réservations de stock"
+        constraints = [
+            models.UniqueConstraint(fields=["cart_token", "product"], name="shop_reservation_cart_product_uniq"),
+        ]
+        indexes = [
+            # Somme des réservations actives d'un produit.
+            models.Index(fields=["product", "expires_at"], name="shop_reservation_active_idx"),
+            # Purge des réservations expirées.
+            models.Index(fields=["expires_at"], name="shop_reservation_expiry_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id} × {self.quantity} ({self.cart_token})"
+
 
 class Order(models.Model):
     class Status(models.TextChoices):
@@ -93,6 +157,9 @@ class Order(models.Model):
     )
     customer_name = models.CharField(max_length=120)
     customer_phone = models.CharField(max_length=40)
+    customer_phone_normalized = models.CharField(
+        max_length=20, blank=True, editable=False, db_index=True, help_text="Chiffres seuls, indicatif 221 inclus."
+    )
     customer_email = models.EmailField(blank=True)
     address = models.CharField(max_length=255)
     city = models.CharField(max_length=120, default="Dakar")
@@ -108,6 +175,24 @@ class Order(models.Model):
     def __str__(self) -> str:
         return f"Commande #{self.pk}"
 
+    def save(self, *args, **kwargs):
+        self.customer_phone_normalized = normalize_phone(self.customer_phone)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "customer_phone" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "customer_phone_normalized"}
+        super().save(*args, **kwargs)
+
+
+def normalize_phone(value: str) -> str:
+    """``+221 77 000 00 00``, ``00221770000000`` et ``77 000 00 00`` → ``221770000000``."""
+    digits = "".join(char for char in value or "" if char.isdigit())
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if len(digits) == 9:
+        # Numéro national sénégalais sans indicatif.
+        digits = f"221{digits}"
+    return digits[:20]
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name="items", on_delete=models.CASCADE)
@@ -126,3 +211,65 @@ class OrderItem(models.Model):
     @property
     def line_total_xof(self) -> int:
         return int(self.quantity) * int(self.unit_price_xof)
+
+
+class DailySales(models.Model):
+    """Ventes agrégées par jour × produit × catégorie × mode de paiement (commandes non annulées)."""
+
+    day = models.DateField()
+    # Historique conservé si le produit ou la catégorie est supprimé (ligne orpheline, sans lien).
+    product = models.ForeignKey(Product, related_name="+", null=True, on_delete=models.SET_NULL)
+    category = models.ForeignKey(Category, related_name="+", null=True, on_delete=models.SET_NULL)
+    payment_method = models.CharField(max_length=20, choices=Order.PaymentMethod.choices)
+    units = models.IntegerField(default=0)
+    revenue_xof = models.BigIntegerField(default=0)
+    order_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Ventes du jour"
+        verbose_name_plural = "Ventes par jour"
+        ordering = ["-day", "category", "product"]
+        constraints = [
+            # Sert aussi d'index pour les plages de dates.
+            models.UniqueConstraint(
+                fields=["day", "product", "category", "payment_method"], name="shop_daily_sales_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["category", "day"], name="shop_daily_sales_category_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} — {self.product_id} ({self.payment_method})"
+
+
+class OutboxMessage(models.Model):
+    """Travail à faire après un checkout, écrit dans la même transaction que la commande."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "En attente"
+        DONE = "done", "Traité"
+        FAILED = "failed", "Abandonné"
+
+    topic = models.CharField(max_length=60)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(help_text="Pas de traitement avant cette date (réessais espacés).")
+    locked_until = models.DateTimeField(blank=True, null=True, editable=False)
+    lock_token = models.CharField(max_length=32, blank=True, editable=False)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Message sortant"
+        verbose_name_plural = "Messages sortants"
+        ordering = ["-created_at"]
+        indexes = [
+            # Prochains messages à traiter.
+            models.Index(fields=["status", "available_at", "id"], name="shop_outbox_due_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.topic} #{self.pk} ({self.status})"
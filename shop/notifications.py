@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
+
+from . import outbox
+from .models import Order, Product
+
+
+ORDER_CONFIRMATION = "order.confirmation"
+ORDER_STAFF = "order.staff"
+STOCK_LOW = "stock.low"
+
+
+def order_placed(order: Order, product_ids) -> None:
+    """Messages de suivi d'une nouvelle commande; à appeler dans la transaction du checkout."""
+    messages = [(ORDER_STAFF, {"order_id": order.pk})]
+    if order.customer_email:
+        messages.append((ORDER_CONFIRMATION, {"order_id": order.pk}))
+
+    threshold = getattr(settings, "SHOP_LOW_STOCK_THRESHOLD", 3)
+    low = Product.objects.filter(pk__in=list(product_ids), stock__lte=threshold).values_list("pk", flat=True)
+    messages.extend((STOCK_LOW, {"product_id": product_id}) for product_id in low)
+    outbox.enqueue_many(messages)
+
+
+def staff_recipients() -> list[str]:
+    return list(getattr(settings, "SHOP_STAFF_EMAILS", []))
+
+
+def _send(subject: str, template: str, context: dict, recipients: list[str]) -> None:
+    if recipients:
+        send_mail(subject, render_to_string(template, context), None, recipients)
+
+
+def _order(payload: dict) -> Order | None:
+    # Commande supprimée entre-temps: rien à envoyer.
+    return Order.objects.prefetch_related("items").filter(pk=payload["order_id"]).first()
+
+
+@outbox.handler(ORDER_CONFIRMATION)
+def send_order_confirmation(payload: dict) -> None:
+    order = _order(payload)
+    if order is not None:
+        _send(
+            f"Makhou Sport — commande #{order.pk} reçue",
+            "shop/emails/order_confirmation.txt",
+            {"order": order},
+            [order.customer_email],
+        )
+
+
+@outbox.handler(ORDER_STAFF)
+def notify_staff(payload: dict) -> None:
+    order = _order(payload)
+    if order is not None:
+        _send(
+            f"Nouvelle commande #{order.pk} — {order.customer_name}",
+            "shop/emails/order_staff.txt",
+            {"order": order},
+            staff_recipients(),
+        )
+
+
+@outbox.handler(STOCK_LOW)
+def alert_low_stock(payload: dict) -> None:
+    product = Product.objects.filter(pk=payload["product_id"]).first()
+    threshold = getattr(settings, "SHOP_LOW_STOCK_THRESHOLD", 3)
+    # Le stock a pu être réapprovisionné depuis la commande.
+    if product is not None and product.stock <= threshold:
+        _send(
+            f"Stock bas: {product.name} ({product.stock})",
+            "shop/emails/stock_low.txt",
+            {"product": product},
+            staff_recipients(),
+        )
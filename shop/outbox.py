@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import logging
+import random
+from datetime import timedelta
+from typing import Callable
+from uuid import uuid4
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from . import db
+from .models import OutboxMessage
+
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], None]
+
+_handlers: dict[str, Handler] = {}
+
+
+def handler(topic: str) -> Callable[[Handler], Handler]:
+    """Enregistre la fonction qui traite les messages ``topic`` (elle reçoit le payload)."""
+
+    def register(func: Handler) -> Handler:
+        _handlers[topic] = func
+        return func
+
+    return register
+
+
+def enqueue(topic: str, payload: dict | None = None, delay: timedelta | None = None) -> OutboxMessage:
+    """À appeler dans la transaction de l'écriture métier: le message n'existe que si elle est validée."""
+    return OutboxMessage.objects.create(
+        topic=topic, payload=payload or {}, available_at=timezone.now() + (delay or timedelta())
+    )
+
+
+def enqueue_many(messages: list[tuple[str, dict]]) -> list[OutboxMessage]:
+    now = timezone.now()
+    return OutboxMessage.objects.bulk_create(
+        [OutboxMessage(topic=topic, payload=payload, available_at=now) for topic, payload in messages]
+    )
+
+
+def _lease() -> timedelta:
+    return timedelta(seconds=getattr(settings, "SHOP_OUTBOX_LEASE", 300))
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    base = getattr(settings, "SHOP_OUTBOX_RETRY_BACKOFF", 30)
+    seconds = min(base * 2 ** (attempts - 1), getattr(settings, "SHOP_OUTBOX_RETRY_MAX_DELAY", 3600))
+    return timedelta(seconds=seconds * (1 + random.random() / 2))
+
+
+def claim(batch_size: int = 50) -> list[OutboxMessage]:
+    """Réserve jusqu'à ``batch_size`` messages dus pour ce worker, le temps du bail (SHOP_OUTBOX_LEASE).
+
+    L'UPDATE conditionnel fait office de verrou (portable, SQLite compris): un message déjà pris par un
+    autre worker n'est pas repris avant l'expiration de son bail.
+    """
+    now = timezone.now()
+    token = uuid4().hex
+    due = OutboxMessage.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lte=now),
+        status=OutboxMessage.Status.PENDING,
+        available_at__lte=now,
+    )
+
+    def take() -> list[int]:
+        ids = list(due.order_by("available_at", "id").values_list("pk", flat=True)[:batch_size])
+        if ids:
+            due.filter(pk__in=ids).update(locked_until=now + _lease(), lock_token=token)
+        return ids
+
+    ids = db.write_transaction(take)
+    if not ids:
+        return []
+    return list(OutboxMessage.objects.filter(pk__in=ids, lock_token=token).order_by("available_at", "id"))
+
+
+def process(message: OutboxMessage) -> bool:
+    """Traite un message réservé; en cas d'erreur, le replanifie avec une attente croissante.
+
+    Livraison « au moins une fois »: un gestionnaire doit supporter d'être rappelé pour le même message.
+    """
+    attempts = message.attempts + 1
+    # Écrit seulement si le bail est toujours à nous (sinon un autre worker a repris le message).
+    mine = OutboxMessage.objects.filter(pk=message.pk, lock_token=message.lock_token)
+    try:
+        func = _handlers.get(message.topic)
+        if func is None:
+            raise LookupError(f"Aucun gestionnaire pour « {message.topic} ».")
+        func(message.payload)
+    except Exception as exc:
+        logger.exception("Message sortant %s en échec (tentative %s).", message.pk, attempts)
+        max_attempts = getattr(settings, "SHOP_OUTBOX_MAX_ATTEMPTS", 8)
+        changes = {
+            "attempts": attempts,
+            "last_error": f"{type(exc).__name__}: {exc}",
+            "locked_until": None,
+            "lock_token": "",
+        }
+        if attempts >= max_attempts:
+            changes["status"] = OutboxMessage.Status.FAILED
+        else:
+            changes["available_at"] = timezone.now() + _retry_delay(attempts)
+        db.write_transaction(lambda: mine.update(**changes))
+        return False
+
+    db.write_transaction(
+        lambda: mine.update(
+            status=OutboxMessage.Status.DONE,
+            attempts=attempts,
+            processed_at=timezone.now(),
+            locked_until=None,
+            lock_token="",
+        )
+    )
+    return True
+
+
+def run_once(batch_size: int = 50) -> tuple[int, int]:
+    """Traite un lot; retourne (réussis, en échec)."""
+    succeeded = failed = 0
+    for message in claim(batch_size):
+        if process(message):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+
+
+# Tri -> (champ, sens, sens de l'id); l'id sert de départage pour obtenir une clé unique.
+SORTS: dict[str, tuple[str, str, str]] = {
+    "recent": ("created_at", "desc", "desc"),
+    "prix_asc": ("price_xof", "asc", "asc"),
+    "prix_desc": ("price_xof", "desc", "desc"),
+    "nom": ("name", "asc", "asc"),
+}
+
+
+def _order_by(field_name: str, direction: str, id_direction: str) -> tuple[str, str]:
+    prefix = "-" if direction == "desc" else ""
+    id_prefix = "-" if id_direction == "desc" else ""
+    return f"{prefix}{field_name}", f"{id_prefix}id"
+
+
+def order_by_fields(tri: str) -> tuple[str, str]:
+    return _order_by(*SORTS[tri])
+
+
+def encode_cursor(value, pk: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, pk], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, model, field_name: str):
+    """Retourne ``(valeur, id)`` ou ``None`` si le curseur est invalide."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = model._meta.get_field(field_name).to_python(value)
+        pk = int(pk)
+    except (binascii.Error, ValueError, TypeError, ValidationError, UnicodeDecodeError):
+        return None
+    if value is None:
+        return None
+    return value, pk
+
+
+def _after(field_name: str, direction: str, id_direction: str, value, pk: int) -> Q:
+    field_lookup, bound_lookup = ("gt", "gte") if direction == "asc" else ("lt", "lte")
+    id_lookup = "gt" if id_direction == "asc" else "lt"
+    after = Q(**{f"{field_name}__{field_lookup}": value}) | Q(**{field_name: value, f"id__{id_lookup}": pk})
+    # Borne redondante: SQLite ne tire pas de plage d'index d'un OR; avec elle, la page part de la clé.
+    return Q(**{f"{field_name}__{bound_lookup}": value}) & after
+
+
+def _reverse(direction: str) -> str:
+    return "asc" if direction == "desc" else "desc"
+
+
+@dataclass
+class CursorPage:
+    object_list: list
+    has_next: bool
+    has_previous: bool
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+    total: int | None = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+
+class CursorPaginator:
+    """Pagination par clé (tri, id): pas de COUNT ni d'OFFSET à chaque page."""
+
+    def __init__(self, queryset: QuerySet, per_page: int, tri: str):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.tri = tri
+        self.field_name, self.direction, self.id_direction = SORTS[tri]
+
+    def _cursor_for(self, obj) -> str:
+        return encode_cursor(getattr(obj, self.field_name), obj.pk)
+
+    def _ordered(self, reverse: bool = False) -> QuerySet:
+        direction = _reverse(self.direction) if reverse else self.direction
+        id_direction = _reverse(self.id_direction) if reverse else self.id_direction
+        return self.queryset.order_by(*_order_by(self.field_name, direction, id_direction))
+
+    def _rows_query(self, after: str | None, before: str | None):
+        """Requête des ``per_page + 1`` lignes de la page, et les clés de curseur décodées."""
+        model = self.queryset.model
+        after_key = decode_cursor(after, model, self.field_name) if after else None
+        before_key = decode_cursor(before, model, self.field_name) if before and not after_key else None
+
+        if before_key:
+            value, pk = before_key
+            queryset = self._ordered(reverse=True).filter(
+                _after(self.field_name, _reverse(self.direction), _reverse(self.id_direction), value, pk)
+            )
+        else:
+            queryset = self._ordered()
+            if after_key:
+                value, pk = after_key
+                queryset = queryset.filter(_after(self.field_name, self.direction, self.id_direction, value, pk))
+        return queryset[: self.per_page + 1], after_key, before_key
+
+    def _page(self, rows: list, after_key, before_key) -> CursorPage:
+        if before_key:
+            has_previous = len(rows) > self.per_page
+            object_list = list(reversed(rows[: self.per_page]))
+            has_next = True
+        else:
+            has_next = len(rows) > self.per_page
+            object_list = rows[: self.per_page]
+            has_previous = after_key is not None
+
+        return CursorPage(
+            object_list=object_list,
+            has_next=has_next and bool(object_list),
+            has_previous=has_previous and bool(object_list),
+            next_cursor=self._cursor_for(object_list[-1]) if object_list else None,
+            previous_cursor=self._cursor_for(object_list[0]) if object_list else None,
+        )
+
+    def get_page(self, after: str | None = None, before: str | None = None) -> CursorPage:
+        queryset, after_key, before_key = self._rows_query(after, before)
+        return self._page(list(queryset), after_key, before_key)
+
+    async def aget_page(self, after: str | None = None, before: str | None = None) -> CursorPage:
+        queryset, after_key, before_key = self._rows_query(after, before)
+        return self._page(await alist(queryset), after_key, before_key)
+
+
+async def alist(queryset) -> list:
+    return [obj async for obj in queryset]
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailySales, Order, OrderItem
+
+
+# (jour, produit, catégorie, mode de paiement) -> [unités, chiffre d'affaires, commandes]
+Key = tuple[date, int, int, str]
+
+
+def is_counted(status: str) -> bool:
+    return status != Order.Status.CANCELED
+
+
+def _new_deltas() -> dict[Key, list[int]]:
+    return defaultdict(lambda: [0, 0, 0])
+
+
+def _add_deltas(deltas: dict[Key, list[int]], order: Order, items, sign: int) -> dict[Key, list[int]]:
+    day = timezone.localdate(order.created_at)
+    for item in items:
+        values = deltas[(day, item.product_id, item.product.category_id, order.payment_method)]
+        values[0] += sign * int(item.quantity)
+        values[1] += sign * int(item.quantity) * int(item.unit_price_xof)
+        values[2] += sign
+    return deltas
+
+
+def apply(deltas: dict[Key, list[int]]) -> None:
+    """Ajoute les deltas aux lignes de rollup (UPDATE, sinon INSERT)."""
+    for (day, product_id, category_id, payment_method), (units, revenue, orders) in deltas.items():
+        if not (units or revenue or orders):
+            continue
+        rows = DailySales.objects.filter(
+            day=day, product_id=product_id, category_id=category_id, payment_method=payment_method
+        )
+        changes = {
+            "units": F("units") + units,
+            "revenue_xof": F("revenue_xof") + revenue,
+            "order_count": F("order_count") + orders,
+        }
+        if rows.update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                DailySales.objects.create(
+                    day=day,
+                    product_id=product_id,
+                    category_id=category_id,
+                    payment_method=payment_method,
+                    units=units,
+                    revenue_xof=revenue,
+                    order_count=orders,
+                )
+        except IntegrityError:
+            # Ligne créée entre-temps par une autre commande du même jour.
+            rows.update(**changes)
+
+
+def record_items(order: Order, items) -> None:
+    """Compte les lignes d'une nouvelle commande (produits déjà chargés de préférence)."""
+    if is_counted(order.status):
+        apply(_add_deltas(_new_deltas(), order, items, 1))
+
+
+def record_order_change(order: Order, previous_status: str, previous_payment_method: str) -> None:
+    """Reporte un changement de statut ou de mode de paiement d'une commande existante."""
+    was_counted, counted = is_counted(previous_status), is_counted(order.status)
+    if was_counted == counted and (not counted or previous_payment_method == order.payment_method):
+        return
+
+    items = list(OrderItem.objects.filter(order_id=order.pk).select_related("product"))
+    deltas = _new_deltas()
+    if was_counted:
+        before = Order(created_at=order.created_at, payment_method=previous_payment_method)
+        _add_deltas(deltas, before, items, -1)
+    if counted:
+        _add_deltas(deltas, order, items, 1)
+    apply(deltas)
+
+
+def record_item_change(item: OrderItem, previous: OrderItem | None, sign: int = 1) -> None:
+    """Reporte l'ajout (``previous`` nul), la modification ou la suppression (``sign=-1``) d'une ligne."""
+    order = Order.objects.only("status", "payment_method", "created_at").filter(pk=item.order_id).first()
+    if order is None or not is_counted(order.status):
+        return
+
+    deltas = _new_deltas()
+    for line, line_sign in ((previous, -1), (item, sign)):
+        if line is not None:
+            _add_deltas(deltas, order, [line], line_sign)
+    apply(deltas)
+
+
+def rebuild(since: date | None = None, until: date | None = None, batch_size: int = 1000) -> int:
+    """Recalcule les rollups de la plage (bornes incluses) depuis les commandes.
+
+    La catégorie retenue est la catégorie actuelle du produit.
+    """
+    rollups = DailySales.objects.all()
+    items = OrderItem.objects.exclude(order__status=Order.Status.CANCELED)
+    if since:
+        rollups = rollups.filter(day__gte=since)
+        items = items.filter(order__created_at__date__gte=since)
+    if until:
+        rollups = rollups.filter(day__lte=until)
+        items = items.filter(order__created_at__date__lte=until)
+
+    rows = (
+        items.annotate(day=TruncDate("order__created_at"))
+        .values("day", "product_id", "product__category_id", "order__payment_method")
+        .annotate(
+            units=Sum("quantity"),
+            revenue_xof=Sum(F("quantity") * F("unit_price_xof")),
+            # Une ligne par produit et par commande: compter les lignes, comme le suivi incrémental.
+            order_count=Count("pk"),
+        )
+        .order_by()
+    )
+
+    created = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(
+                DailySales(
+                    day=row["day"],
+                    product_id=row["product_id"],
+                    category_id=row["product__category_id"],
+                    payment_method=row["order__payment_method"],
+                    units=row["units"],
+                    revenue_xof=row["revenue_xof"],
+                    order_count=row["order_count"],
+                )
+            )
+            if len(batch) >= batch_size:
+                created += len(DailySales.objects.bulk_create(batch))
+                batch = []
+        created += len(DailySales.objects.bulk_create(batch))
+    return created
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_ALIAS = "replica"
+
+# Modèles du catalogue: lus sur le réplica. Commandes, réservations, sessions, etc. restent sur le primaire.
+REPLICA_MODELS = {"shop.category", "shop.product", "shop.productimage"}
+
+_pinned: contextvars.ContextVar[bool] = contextvars.ContextVar("shop_db_pinned_to_primary", default=False)
+
+
+def has_replica() -> bool:
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def pinned() -> bool:
+    """Lectures de la requête courante forcées sur le primaire (``use_primary``)."""
+    return _pinned.get()
+
+
+@contextmanager
+def use_primary():
+    """Toutes les lectures du bloc vont au primaire (lecture de ses propres écritures)."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def primary(view):
+    """Décorateur de vue: ``use_primary`` pour toute la requête."""
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapped(request, *args, **kwargs):
+            with use_primary():
+                return await view(request, *args, **kwargs)
+
+        return async_wrapped
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        with use_primary():
+            return view(request, *args, **kwargs)
+
+    return wrapped
+
+
+class PrimaryReplicaRouter:
+    """Lectures du catalogue sur l'alias ``replica`` s'il est configuré; tout le reste sur ``default``."""
+
+    def db_for_read(self, model, **hints):
+        if not has_replica() or pinned() or model._meta.label_lower not in REPLICA_MODELS:
+            return DEFAULT_DB_ALIAS
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Le réplica est une copie du primaire: mêmes lignes des deux côtés.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Le schéma arrive sur le réplica par la réplication (ou la copie locale), pas par migrate.
+        return db != REPLICA_ALIAS
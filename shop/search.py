@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import re
+
+from django.db import connection
+from django.db.models import Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Category, Product
+
+
+FTS_TABLE = "shop_product_fts"
+
+# Poids bm25 des colonnes (nom, description, catégorie).
+FTS_WEIGHTS = (10.0, 2.0, 4.0)
+
+MAX_TERMS = 8
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def is_available() -> bool:
+    return connection.vendor == "sqlite"
+
+
+def ensure_index() -> None:
+    if not is_available():
+        return
+    # unicode61 + remove_diacritics: "vetements" trouve "Vêtements".
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "name, description, category, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+        )
+
+
+def _index_sql(where: str) -> str:
+    product_table = Product._meta.db_table
+    category_table = Category._meta.db_table
+    return (
+        f"INSERT INTO {FTS_TABLE}(rowid, name, description, category) "
+        f"SELECT p.id, p.name, p.description, c.name FROM {product_table} p "
+        f"INNER JOIN {category_table} c ON c.id = p.category_id WHERE {where}"
+    )
+
+
+def index_products(product_ids) -> None:
+    product_ids = [int(pk) for pk in product_ids]
+    if not product_ids or not is_available():
+        return
+
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", product_ids)
+        cursor.execute(_index_sql(f"p.id IN ({placeholders})"), product_ids)
+
+
+def index_category(category_id: int) -> None:
+    if not is_available():
+        return
+
+    product_table = Product._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT id FROM {product_table} WHERE category_id = %s)",
+            [category_id],
+        )
+        cursor.execute(_index_sql("p.category_id = %s"), [category_id])
+
+
+def remove_products(product_ids) -> None:
+    product_ids = [int(pk) for pk in product_ids]
+    if not product_ids or not is_available():
+        return
+
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", product_ids)
+
+
+def rebuild() -> int:
+    if not is_available():
+        return 0
+
+    ensure_index()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(_index_sql("1 = 1"))
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return int(cursor.fetchone()[0])
+
+
+def _stem(term: str) -> str:
+    # Racinisation légère (pluriel, e final) pour tolérer "chaussete" / "chaussettes".
+    term = term.lower()
+    for suffix in ("s", "e"):
+        if len(term) > 4 and term.endswith(suffix):
+            term = term[: -len(suffix)]
+    return term
+
+
+def build_match_query(q: str) -> str:
+    # Chaque terme devient un préfixe: "chauss" trouve "Chaussettes".
+    terms = _TERM_RE.findall(q)[:MAX_TERMS]
+    return " ".join(f'"{_stem(term)}"*' for term in terms)
+
+
+def filter_queryset(queryset: QuerySet, q: str) -> QuerySet:
+    """Filtre ``queryset`` sur ``q`` et annote ``search_rank`` (plus petit = plus pertinent)."""
+    match = build_match_query(q)
+    if not match:
+        # Annoté quand même: le tri « pertinence » s'applique aussi au résultat vide.
+        return queryset.none().annotate(search_rank=Value(0.0))
+
+    if not is_available():
+        return queryset.filter(
+            Q(name__icontains=q) | Q(description__icontains=q) | Q(category__name__icontains=q)
+        ).annotate(search_rank=Value(0.0))
+
+    product_table = Product._meta.db_table
+    weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+    return queryset.filter(
+        id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+    ).annotate(
+        search_rank=RawSQL(
+            f"SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = "{product_table}"."id"',
+            (match,),
+        )
+    )
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import catalog, fragments, images, reporting, search
+from .models import Category, Order, OrderItem, Product, ProductImage
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance: Product, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_products([instance.pk])
+    fragments.invalidate_cards([instance.pk])
+    catalog.invalidate()
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance: Product, **kwargs):
+    search.remove_products([instance.pk])
+    fragments.invalidate_cards([instance.pk])
+    catalog.invalidate()
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance: Category, raw=False, created=False, **kwargs):
+    if raw:
+        return
+    if not created:
+        search.index_category(instance.pk)
+    # Les cartes produit se périment d'elles-mêmes: le nom de la catégorie fait partie de leur empreinte.
+    catalog.invalidate()
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance: Category, **kwargs):
+    catalog.invalidate()
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def product_image_changed(sender, instance: ProductImage, raw=False, **kwargs):
+    if raw:
+        return
+    images.refresh_primary_images([instance.product_id])
+    fragments.invalidate_cards([instance.product_id])
+    catalog.invalidate()
+
+
+@receiver(post_save, sender=ProductImage)
+def product_image_saved(sender, instance: ProductImage, raw=False, **kwargs):
+    if raw or not instance.image or instance.derivatives:
+        return
+    # Pillow (plusieurs fichiers JPEG/WebP) ne bloque ni n'annule l'enregistrement: voir process_outbox.
+    images.queue_derivatives(instance)
+
+
+@receiver(pre_save, sender=Order)
+def order_saving(sender, instance: Order, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    instance._sales_previous = Order.objects.filter(pk=instance.pk).values_list("status", "payment_method").first()
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance: Order, raw=False, created=False, **kwargs):
+    previous = getattr(instance, "_sales_previous", None)
+    if raw or created or previous is None:
+        return
+    reporting.record_order_change(instance, *previous)
+
+
+@receiver(pre_save, sender=OrderItem)
+def order_item_saving(sender, instance: OrderItem, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    instance._sales_previous = OrderItem.objects.filter(pk=instance.pk).select_related("product").first()
+
+
+@receiver(post_save, sender=OrderItem)
+def order_item_saved(sender, instance: OrderItem, raw=False, **kwargs):
+    # Les lignes créées par le checkout (bulk_create) sont comptées par la vue elle-même.
+    if raw:
+        return
+    reporting.record_item_change(instance, getattr(instance, "_sales_previous", None))
+
+
+@receiver(post_delete, sender=OrderItem)
+def order_item_deleted(sender, instance: OrderItem, **kwargs):
+    # Aussi appelé pour chaque ligne quand la commande est supprimée (avant la commande elle-même).
+    reporting.record_item_change(instance, None, -1)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # Optionnel: sans le paquet brotli, seules les variantes .gz sont écrites.
+    brotli = None
+
+
+COMPRESSIBLE = {".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".html", ".xml", ".ico", ".ttf", ".otf", ".eot"}
+
+# En dessous, l'en-tête de la compression mange le gain.
+MIN_SIZE = 256
+
+
+def _compressors():
+    yield ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield ".br", lambda data: brotli.compress(data, quality=11)
+
+
+def compress_file(path: str) -> list[str]:
+    """Écrit ``path.gz`` (et ``path.br``) à côté de ``path`` quand la variante est plus petite."""
+    data = Path(path).read_bytes()
+    if len(data) < MIN_SIZE:
+        return []
+    written = []
+    for suffix, compress in _compressors():
+        compressed = compress(data)
+        if len(compressed) < len(data):
+            Path(path + suffix).write_bytes(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Noms hashés (cache d'un an) puis variantes .gz/.br des fichiers texte, compressées en parallèle.
+
+    Les variantes sont servies telles quelles par ``shop.media.serve_static`` ou un proxy (gzip_static).
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        names = {name for name in self.hashed_files.values() if Path(name).suffix.lower() in COMPRESSIBLE}
+        # zlib et brotli relâchent le GIL: les threads suffisent.
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+            list(pool.map(compress_file, [self.path(name) for name in sorted(names)]))
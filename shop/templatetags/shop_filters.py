@@ -1,4 +1,7 @@
 from django import template
+from django.utils.html import format_html, format_html_join
+
+from shop import fragments, images
 
 register = template.Library()
 
@@ -12,3 +15,35 @@ def xof(value):
 
     return f"{value_int:,}".replace(",", " ") + " FCFA"
 
+
+@register.simple_tag
+def responsive_image(image, alt="", sizes="100vw", css_class="", loading="lazy"):
+    """<picture> avec sources WebP/JPEG (srcset + sizes) et dimensions intrinsèques."""
+    attrs = [("src", image.image.url), ("alt", alt)]
+    jpeg_srcset = images.srcset(image, "jpeg")
+    if jpeg_srcset:
+        attrs += [("srcset", jpeg_srcset), ("sizes", sizes)]
+    if image.width and image.height:
+        attrs += [("width", image.width), ("height", image.height)]
+    if css_class:
+        attrs.append(("class", css_class))
+    if loading:
+        attrs += [("loading", loading), ("decoding", "async")]
+
+    img = format_html("<img{} />", format_html_join("", ' {}="{}"', attrs))
+    webp_srcset = images.srcset(image, "webp")
+    if not webp_srcset:
+        return img
+
+    return format_html(
+        '<picture class="contents"><source type="image/webp" srcset="{}" sizes="{}" />{}</picture>',
+        webp_srcset,
+        sizes,
+        img,
+    )
+
+
+@register.simple_tag
+def product_cards(products):
+    """Cartes produit depuis le cache de fragments (une seule lecture de cache pour la page)."""
+    return fragments.render_cards(products)
@@ -1,3 +1,786 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import sqlite3
+import tempfile
+import threading
+import zlib
+from contextlib import ExitStack, contextmanager
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import Http404
+from django.test import Client, RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from . import catalog, compression, exports, facets, fragments, importer, media, outbox, pagination, routers, search
+from .models import Category, DailySales, Order, OrderItem, OutboxMessage, Product, ProductImage
+from .routers import PrimaryReplicaRouter
+
+
+CHECKOUT_DATA = {
+    "customer_name": "Makhou Ndiaye",
+    "customer_phone": "+221 77 000 00 00",
+    "customer_email": "",
+    "address": "Sacré-Coeur 3",
+    "city": "Dakar",
+    "payment_method": "cash",
+    "notes": "",
+}
+
+
+@contextmanager
+def on_disk_database():
+    """Base de test SQLite en mémoire copiée dans un fichier le temps du bloc (threads compris).
+
+    En mémoire (cache partagé), une lecture concurrente d'une écriture échoue aussitôt
+    (« database table is locked ») au lieu d'attendre comme en production.
+    """
+    default = connections[DEFAULT_DB_ALIAS]
+    if default.vendor != "sqlite" or not default.is_in_memory_db():
+        yield
+        return
+
+    name = default.settings_dict["NAME"]
+    # Le réplica de test est un miroir: même base, donc même fichier.
+    wrappers = [connections[alias] for alias in connections if connections[alias].settings_dict["NAME"] == name]
+    default.ensure_connection()
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "test.sqlite3")
+        target = sqlite3.connect(path)
+        default.connection.backup(target)
+        target.close()
+
+        # Les threads créent leurs connexions depuis ces mêmes settings_dict.
+        memory = [wrapper.connection for wrapper in wrappers]
+        for wrapper in wrappers:
+            wrapper.connection = None
+            wrapper.settings_dict["NAME"] = path
+        try:
+            yield
+        finally:
+            for wrapper, connection in zip(wrappers, memory):
+                wrapper.close()
+                wrapper.settings_dict["NAME"] = name
+                wrapper.connection = connection
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    # Avec DJANGO_DB_REPLICA_NAME, le catalogue est lu via l'alias « replica » (miroir de default).
+    databases = "__all__"
+
+    def setUp(self):
+        category = Category.objects.create(name="Chaussettes", slug="chaussettes")
+        self.product = Product.objects.create(
+            category=category, name="Pack noir/blanc", slug="pack-noir-blanc", price_xof=3000, stock=5
+        )
+
+    def test_parallel_checkouts_never_oversell(self):
+        buyers = 12
+        with on_disk_database():
+            clients = []
+            for _ in range(buyers):
+                client = Client()
+                client.post(reverse("shop:cart_add", args=[self.product.pk]), {"quantity": 1})
+                clients.append(client)
+
+            barrier = threading.Barrier(buyers)
+            errors = []
+
+            def buy(client):
+                try:
+                    barrier.wait()
+                    client.post(reverse("shop:checkout"), CHECKOUT_DATA)
+                except Exception as exc:  # noqa: BLE001 - remonté au thread du test ci-dessous
+                    errors.append(exc)
+                finally:
+                    connections.close_all()
+
+            threads = [threading.Thread(target=buy, args=(client,)) for client in clients]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            self.product.refresh_from_db()
+            sold = sum(OrderItem.objects.filter(product=self.product).values_list("quantity", flat=True))
+            self.assertEqual(sold + self.product.stock, 5)
+            self.assertEqual(Order.objects.count(), OrderItem.objects.count())
+            self.assertGreater(sold, 0)
+            self.assertLessEqual(sold, 5)
+
+    def test_checkout_only_bumps_stock_version(self):
+        client = Client()
+        client.post(reverse("shop:cart_add", args=[self.product.pk]), {"quantity": 1})
+        version, stock_version = catalog.get_version(), catalog.get_stock_version()
+
+        client.post(reverse("shop:checkout"), CHECKOUT_DATA)
+
+        self.assertTrue(Order.objects.exists())
+        self.assertEqual(catalog.get_version(), version)
+        self.assertNotEqual(catalog.get_stock_version(), stock_version)
+
+    def test_checkout_prices_ignore_product_cache(self):
+        client = Client()
+        client.post(reverse("shop:cart_add", args=[self.product.pk]), {"quantity": 1})
+        # Produit mis en cache depuis un réplica en retard: ancien prix sous la version courante.
+        stale = Product.objects.get(pk=self.product.pk)
+        stale.price_xof = 1000
+        cache.set(f"shop:catalog:{catalog.get_version()}:product:{stale.pk}", stale)
+
+        client.post(reverse("shop:checkout"), CHECKOUT_DATA)
+
+        self.assertEqual(OrderItem.objects.get().unit_price_xof, 3000)
+
+    def test_failed_line_rolls_back_whole_order(self):
+        other = Product.objects.create(
+            category=self.product.category, name="Pack multicolore", slug="pack-multicolore", price_xof=3500, stock=1
+        )
+        client = Client()
+        client.post(reverse("shop:cart_add", args=[self.product.pk]), {"quantity": 2})
+        client.post(reverse("shop:cart_add", args=[other.pk]), {"quantity": 1})
+        Product.objects.filter(pk=other.pk).update(stock=0)
+
+        response = client.post(reverse("shop:checkout"), CHECKOUT_DATA)
+
+        self.assertRedirects(response, reverse("shop:cart_detail"))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OutboxMessage.objects.exists())
+
+
+@override_settings(SHOP_STAFF_EMAILS=["equipe@makhousport.sn"], SHOP_LOW_STOCK_THRESHOLD=3)
+class OutboxTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        category = Category.objects.create(name="Chaussettes", slug="chaussettes")
+        self.product = Product.objects.create(
+            category=category, name="Pack noir/blanc", slug="pack-noir-blanc", price_xof=3000, stock=5
+        )
+
+    def test_checkout_queues_messages_sent_by_worker(self):
+        client = Client()
+        client.post(reverse("shop:cart_add", args=[self.product.pk]), {"quantity": 2})
+        client.post(reverse("shop:checkout"), {**CHECKOUT_DATA, "customer_email": "client@example.com"})
+
+        self.assertEqual(OutboxMessage.objects.filter(status=OutboxMessage.Status.PENDING).count(), 3)
+        self.assertEqual(mail.outbox, [])
+
+        call_command("process_outbox", "--once", stdout=StringIO())
+
+        self.assertFalse(OutboxMessage.objects.exclude(status=OutboxMessage.Status.DONE).exists())
+        recipients = sorted(message.to[0] for message in mail.outbox)
+        self.assertEqual(recipients, ["client@example.com", "equipe@makhousport.sn", "equipe@makhousport.sn"])
+
+    def test_failing_handler_is_retried_later(self):
+        message = OutboxMessage.objects.create(topic="inconnu", available_at=self.product.created_at)
+
+        with self.assertLogs("shop.outbox", "ERROR"):
+            call_command("process_outbox", "--once", stdout=StringIO())
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.Status.PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertGreater(message.available_at, self.product.created_at)
+        self.assertIn("LookupError", message.last_error)
+
+    def test_image_derivatives_are_built_by_worker(self):
+        buffer = BytesIO()
+        Image.new("RGB", (1000, 600), "white").save(buffer, "JPEG")
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            image = ProductImage.objects.create(
+                product=self.product, image=SimpleUploadedFile("pack.jpg", buffer.getvalue())
+            )
+
+            image.refresh_from_db()
+            self.assertEqual(image.derivatives, {})
+            self.assertTrue(OutboxMessage.objects.filter(topic="image.derivatives").exists())
+
+            call_command("process_outbox", "--once", stdout=StringIO())
+
+            image.refresh_from_db()
+            self.assertIn(1000, image.derivatives["webp"])
+
+
+class OrderAdminSearchTests(TransactionTestCase):
+    databases = "__all__"
+
+    def test_numeric_term_shows_order_and_phone_matches(self):
+        def order(phone: str, **fields) -> Order:
+            return Order.objects.create(
+                customer_name="Client",
+                customer_phone=phone,
+                address="Dakar",
+                city="Dakar",
+                payment_method="cash",
+                total_xof=3000,
+                **fields,
+            )
+
+        by_pk = order("+221 70 111 11 11", pk=77)
+        by_phone = order("+221 77 123 45 67")
+        other = order("+221 70 222 22 22")
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", "secret")
+        client = Client()
+        client.force_login(admin_user)
+
+        response = client.get(reverse("admin:shop_order_changelist"), {"q": "77"})
+
+        results = set(response.context["cl"].result_list)
+        self.assertIn(by_pk, results)
+        self.assertIn(by_phone, results)
+        self.assertNotIn(other, results)
+
+
+class SearchTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        category = Category.objects.create(name="Maillots", slug="maillots")
+        self.jersey = Product.objects.create(
+            category=category, name="Maillot Sénégal domicile", slug="maillot-senegal", price_xof=15000
+        )
+        self.shorts = Product.objects.create(
+            category=category,
+            name="Short d'entraînement",
+            slug="short-entrainement",
+            description="Assorti au maillot du Sénégal.",
+            price_xof=8000,
+        )
+        Product.objects.create(category=category, name="Gourde", slug="gourde", price_xof=2000)
+
+    def names(self, q: str) -> list[str]:
+        response = self.client.get(reverse("shop:product_list"), {"q": q})
+        return [product.name for product in response.context["page_obj"]]
+
+    def test_accents_and_plurals_are_ignored(self):
+        for q in ("senegal", "SÉNÉGAL", "entrainement", "maillots"):
+            with self.subTest(q=q):
+                self.assertTrue(self.names(q))
+        self.assertEqual(self.names("entrainement"), ["Short d'entraînement"])
+
+    def test_name_match_ranks_before_description_match(self):
+        self.assertEqual(self.names("senegal"), ["Maillot Sénégal domicile", "Short d'entraînement"])
+
+    def test_other_databases_fall_back_to_icontains(self):
+        with mock.patch.object(search, "is_available", return_value=False):
+            found = search.filter_queryset(Product.objects.all(), "Gourde")
+            self.assertEqual([product.name for product in found], ["Gourde"])
+            self.assertEqual(found[0].search_rank, 0.0)
+
+
+class CursorPaginationTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        category = Category.objects.create(name="Chaussettes", slug="chaussettes")
+        # Prix en double: le départage par id doit garder chaque produit une seule fois.
+        for index, price in enumerate([3000, 1500, 3000, 4500, 1500, 3000, 2000]):
+            Product.objects.create(
+                category=category, name=f"Pack {index % 3}", slug=f"pack-{index}", price_xof=price
+            )
+
+    def walk(self, tri: str) -> tuple[list[int], list[list[int]]]:
+        paginator = pagination.CursorPaginator(Product.objects.all(), 3, tri)
+        pages = [paginator.get_page()]
+        while pages[-1].has_next:
+            pages.append(paginator.get_page(after=pages[-1].next_cursor))
+        return [product.pk for page in pages for product in page], [[p.pk for p in page] for page in pages]
+
+    def test_next_pages_follow_sort_order(self):
+        for tri in pagination.SORTS:
+            with self.subTest(tri=tri):
+                ids, pages = self.walk(tri)
+                expected = list(
+                    Product.objects.order_by(*pagination.order_by_fields(tri)).values_list("pk", flat=True)
+                )
+                self.assertEqual(ids, expected)
+                self.assertEqual([len(page) for page in pages], [3, 3, 1])
+
+    def test_previous_pages_mirror_next_pages(self):
+        for tri in pagination.SORTS:
+            with self.subTest(tri=tri):
+                paginator = pagination.CursorPaginator(Product.objects.all(), 3, tri)
+                _, pages = self.walk(tri)
+                page = paginator.get_page(after=paginator.get_page().next_cursor)
+                page = paginator.get_page(after=page.next_cursor)
+                back = []
+                while page.has_previous:
+                    page = paginator.get_page(before=page.previous_cursor)
+                    back.insert(0, [product.pk for product in page])
+                self.assertEqual(back, pages[:2])
+                self.assertFalse(page.has_previous)
+
+    def test_tampered_cursor_shows_first_page(self):
+        first = [product.pk for product in pagination.CursorPaginator(Product.objects.all(), 3, "prix_asc").get_page()]
+        tokens = ["%%%", "bm9wZQ", pagination.encode_cursor("abc", 1), pagination.encode_cursor(None, 1)]
+        for token in tokens:
+            with self.subTest(token=token):
+                self.assertIsNone(pagination.decode_cursor(token, Product, "price_xof"))
+                response = self.client.get(reverse("shop:product_list"), {"tri": "prix_asc", "after": token})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([product.pk for product in response.context["page_obj"]][:3], first)
+                response = self.client.get(reverse("shop:product_list"), {"tri": "prix_asc", "before": token})
+                self.assertEqual(response.status_code, 200)
+
+
+class CartStorageTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        category = Category.objects.create(name="Chaussettes", slug="chaussettes")
+        self.product = Product.objects.create(
+            category=category, name="Pack noir/blanc", slug="pack-noir-blanc", price_xof=3000, stock=5
+        )
+
+    def test_browsing_and_cart_changes_write_nothing_to_database(self):
+        for storage in ("shop.cart.SignedCookieCartStorage", "shop.cart.CacheCartStorage"):
+            with self.subTest(storage=storage), override_settings(SHOP_CART_STORAGE=storage):
+                client = Client()
+                with ExitStack() as stack:
+                    captured = [
+                        stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections
+                    ]
+                    client.get(reverse("shop:product_list"))
+                    client.post(reverse("shop:cart_add", args=[self.product.pk]), {"quantity": 2})
+                    response = client.get(reverse("shop:cart_detail"))
+
+                lines = [(line.product.pk, line.quantity) for line in response.context["lines"]]
+                self.assertEqual(lines, [(self.product.pk, 2)])
+                writes = [
+                    query["sql"]
+                    for context in captured
+                    for query in context.captured_queries
+                    if not query["sql"].lstrip().upper().startswith("SELECT")
+                ]
+                self.assertEqual(writes, [])
+
+
+class ProductCardTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Chaussettes", slug="chaussettes")
+        self.product = Product.objects.create(
+            category=self.category, name="Pack noir/blanc", slug="pack-noir-blanc", price_xof=3000, stock=5
+        )
+
+    def listing(self) -> str:
+        return self.client.get(reverse("shop:product_list")).content.decode()
+
+    def test_cached_card_is_not_rendered_again(self):
+        self.listing()
+        with mock.patch.object(fragments, "render_to_string") as render:
+            self.assertIn("Pack noir/blanc", self.listing())
+        render.assert_not_called()
+
+    def test_product_category_and_stock_changes_refresh_card(self):
+        self.listing()
+
+        self.product.name = "Pack tricolore"
+        self.product.save()
+        self.assertIn("Pack tricolore", self.listing())
+
+        self.category.name = "Chaussettes de sport"
+        self.category.save()
+        self.assertIn("Chaussettes de sport", self.listing())
+
+        # Stock décrémenté par une commande (update(), sans save() ni signal).
+        Product.objects.filter(pk=self.product.pk).update(stock=0)
+        catalog.bump_stock_version()
+        self.assertIn("Rupture de stock", self.listing())
+
+
+class CatalogImportTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.categories = [{"id": "c1", "name": "Maillots", "slug": "maillots"}, {"name": "Gourdes"}]
+        self.products = [
+            {"slug": "maillot-domicile", "name": "Maillot domicile", "category": "c1", "priceXof": 15000, "stock": 4},
+            {"slug": "maillot-exterieur", "name": "Maillot extérieur", "category": "c1", "priceXof": 15000},
+            {"name": "Gourde 1 L", "category": "gourdes", "priceXof": "2500", "stock": "10"},
+            {"slug": "sans-prix", "name": "Sans prix", "category": "c1"},
+        ]
+
+    def run_import(self) -> tuple[importer.ImportStats, importer.ImportStats]:
+        categories_path = self.directory / "categories.json"
+        products_path = self.directory / "products.jsonl"
+        categories_path.write_text(json.dumps(self.categories), encoding="utf-8")
+        products_path.write_text("\n".join(json.dumps(record) for record in self.products), encoding="utf-8")
+
+        category_stats, refs = importer.import_categories(importer.read_records(str(categories_path)), 1)
+        return category_stats, importer.import_products(importer.read_records(str(products_path)), refs, 2)
+
+    def counts(self, stats: importer.ImportStats) -> tuple[int, int, int, int]:
+        return stats.inserted, stats.updated, stats.unchanged, stats.skipped
+
+    def test_import_counts_and_idempotence(self):
+        category_stats, product_stats = self.run_import()
+        self.assertEqual(self.counts(category_stats), (2, 0, 0, 0))
+        self.assertEqual(self.counts(product_stats), (3, 0, 0, 1))
+        self.assertIn("sans-prix", product_stats.errors[0])
+        self.assertEqual(Product.objects.get(slug="gourde-1-l").stock, 10)
+
+        category_stats, product_stats = self.run_import()
+        self.assertEqual(self.counts(category_stats), (0, 0, 2, 0))
+        self.assertEqual(self.counts(product_stats), (0, 0, 3, 1))
+        self.assertEqual(Product.objects.count(), 3)
+
+        self.products[1]["priceXof"] = 12000
+        _, product_stats = self.run_import()
+        self.assertEqual(self.counts(product_stats), (0, 1, 2, 1))
+        self.assertEqual(Product.objects.get(slug="maillot-exterieur").price_xof, 12000)
+
+
+class OrderExportTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        category = Category.objects.create(name="Chaussettes", slug="chaussettes")
+        product = Product.objects.create(category=category, name="Pack", slug="pack", price_xof=3000)
+        for index in range(3):
+            order = Order.objects.create(
+                customer_name='=HYPERLINK("http://exemple.test")' if index == 0 else f"Client {index}",
+                customer_phone="+221 77 000 00 00",
+                address="Dakar",
+                city="Dakar",
+                notes="-2+3" if index == 0 else "",
+                payment_method="cash",
+                total_xof=6000,
+            )
+            for name in ("@SUM(A1)", "Pack"):
+                OrderItem.objects.create(
+                    order=order, product=product, product_name=name, quantity=1, unit_price_xof=3000
+                )
+
+    def test_admin_export_streams_one_row_per_line(self):
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", "secret")
+        self.client.force_login(admin_user)
+
+        response = self.client.post(
+            reverse("admin:shop_order_changelist"),
+            {"action": "export_csv", "_selected_action": list(Order.objects.values_list("pk", flat=True))},
+        )
+
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = list(csv.DictReader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(len(rows), 6)
+
+    def test_formulas_are_escaped(self):
+        rows = list(csv.DictReader(exports.csv_lines(Order.objects.order_by("pk"))))
+
+        self.assertEqual(rows[0]["customer_name"], """'=HYPERLINK("http://exemple.test")""")
+        self.assertEqual(rows[0]["notes"], "'-2+3")
+        self.assertEqual(rows[0]["product_name"], "'@SUM(A1)")
+        self.assertEqual(rows[2]["customer_name"], "Client 1")
+
+    def test_items_are_read_once_per_chunk(self):
+        # Une requête de commandes, puis une requête de lignes par paquet de deux commandes.
+        with self.assertNumQueries(3):
+            lines = list(exports.csv_lines(Order.objects.order_by("pk"), chunk_size=2))
+        self.assertEqual(len(lines), 7)
+
+
+class MediaServingTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = Path(directory.name)
+        (root / "media" / "products").mkdir(parents=True)
+        (root / "media" / "products" / "video.bin").write_bytes(bytes(range(10)))
+        (root / "secret.txt").write_text("secret")
+        (root / "static").mkdir()
+        (root / "static" / "site.css").write_text("body {}")
+        (root / "static" / "site.css.br").write_bytes(b"br")
+        roots = override_settings(MEDIA_ROOT=root / "media", STATIC_ROOT=root / "static")
+        roots.enable()
+        self.addCleanup(roots.disable)
+
+    def get(self, path: str, **headers):
+        return media.serve_media(RequestFactory().get("/media/" + path, **headers), path)
+
+    def test_byte_ranges(self):
+        response = self.get("products/video.bin", HTTP_RANGE="bytes=2-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), bytes([2, 3, 4, 5]))
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(response["Content-Length"], "4")
+
+        response = self.get("products/video.bin", HTTP_RANGE="bytes=-3")
+        self.assertEqual(b"".join(response.streaming_content), bytes([7, 8, 9]))
+
+        # Plage pour une autre version du fichier: réponse complète.
+        response = self.get("products/video.bin", HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"autre"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), bytes(range(10)))
+
+    def test_range_outside_file_is_416(self):
+        response = self.get("products/video.bin", HTTP_RANGE="bytes=10-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+
+    def test_etag_answers_304(self):
+        etag = self.get("products/video.bin")["ETag"]
+        self.assertEqual(self.get("products/video.bin", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_paths_outside_media_root_are_404(self):
+        for path in ("../secret.txt", "products/../../secret.txt", "/../secret.txt", "products", "absent.bin"):
+            with self.subTest(path=path), self.assertRaises(Http404):
+                self.get(path)
+
+    def test_static_serves_precompressed_variant(self):
+        request = RequestFactory().get("/static/site.css", HTTP_ACCEPT_ENCODING="gzip, br")
+        response = media.serve_static(request, "site.css")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(b"".join(response.streaming_content), b"br")
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+
+class CompressionTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        category = Category.objects.create(name="Chaussettes", slug="chaussettes")
+        for index in range(6):
+            Product.objects.create(category=category, name=f"Pack {index}", slug=f"pack-{index}", price_xof=3000)
+
+    def test_page_is_compressed_and_varies_on_accept_encoding(self):
+        url = reverse("shop:product_list")
+        plain = self.client.get(url)
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertTrue(response["ETag"].startswith("W/"))
+        self.assertEqual(len(gzip.decompress(response.content)), len(plain.content))
+
+    def test_refused_codings_are_not_used(self):
+        self.assertIsNone(compression.negotiate("gzip;q=0, identity"))
+        self.assertEqual(compression.negotiate("deflate, gzip;q=0.5"), "gzip")
+
+    def test_stream_is_sent_before_it_ends(self):
+        consumed = []
+
+        def chunks():
+            for index in range(4):
+                consumed.append(index)
+                yield b"x" * compression.FLUSH_SIZE
+
+        stream = compression.compress_stream("gzip", chunks())
+        first = next(stream)
+        decoder = zlib.decompressobj(31)
+
+        self.assertEqual(consumed, [0])
+        self.assertEqual(decoder.decompress(first), b"x" * compression.FLUSH_SIZE)
+        self.assertEqual(decoder.decompress(b"".join(stream)), b"x" * compression.FLUSH_SIZE * 3)
+
+    def test_streamed_export_stays_streamed(self):
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", "secret")
+        self.client.force_login(admin_user)
+        Order.objects.create(
+            customer_name="Client",
+            customer_phone="+221 77 000 00 00",
+            address="Dakar",
+            city="Dakar",
+            payment_method="cash",
+            total_xof=3000,
+        )
+        data = {"action": "export_csv", "_selected_action": list(Order.objects.values_list("pk", flat=True))}
+
+        response = self.client.post(reverse("admin:shop_order_changelist"), data, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        self.assertIn(b"Client", gzip.decompress(b"".join(response.streaming_content)))
+
+
+class FacetTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Chaussettes", slug="chaussettes")
+        for index, (price, stock) in enumerate([(2500, 0), (3500, 4), (4500, 2), (12000, 1)]):
+            Product.objects.create(
+                category=self.category,
+                name=f"Pack {index}",
+                slug=f"pack-{index}",
+                price_xof=price,
+                stock=stock,
+            )
+
+    def facet_counts(self, **params) -> facets.Facets:
+        return self.client.get(reverse("shop:product_list"), params).context["facets"]
+
+    def test_counts_ignore_own_facet_only(self):
+        other = Category.objects.create(name="Gourdes", slug="gourdes")
+        Product.objects.create(category=other, name="Gourde", slug="gourde", price_xof=4000, stock=0)
+
+        result = self.facet_counts()
+        self.assertEqual(result.total, 5)
+        self.assertEqual(result.in_stock.count, 3)
+        self.assertEqual([option.count for option in result.prices], [1, 3, 0, 1])
+        categories = [(option.label, option.count) for option in result.categories]
+        self.assertEqual(categories, [("Chaussettes", 4), ("Gourdes", 1)])
+
+        result = self.facet_counts(prix="3000-5000", dispo="1")
+        self.assertEqual(result.total, 2)
+        # Chaque facette compte avec les autres filtres, sans le sien.
+        self.assertEqual(result.in_stock.count, 2)
+        self.assertEqual([option.count for option in result.prices], [0, 2, 0, 1])
+        self.assertEqual([option.count for option in result.categories], [2, 0])
+        self.assertTrue(result.prices[1].selected)
+        self.assertNotIn("prix=", result.prices[1].query)
+
+    def test_counts_are_one_cached_query(self):
+        base = Product.objects.filter(is_active=True)
+        selection = facets.Selection(prix="3000-5000")
+        with self.assertNumQueries(1):
+            first = facets.counts(base, selection, [self.category.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(facets.counts(base, selection, [self.category.pk]), first)
+
+        catalog.bump_stock_version()
+        with self.assertNumQueries(1):
+            facets.counts(base, selection, [self.category.pk])
+
+    def test_punctuation_only_search_lists_nothing(self):
+        for q in ("!!", "\"'*()"):
+            for params in ({"q": q}, {"q": q, "tri": "recent", "prix": "3000-5000", "dispo": "1"}):
+                with self.subTest(q=q, params=params):
+                    response = self.client.get(reverse("shop:product_list"), params)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.context["facets"].total, 0)
+
+
+class ReplicaTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        category = Category.objects.create(name="Chaussettes", slug="chaussettes")
+        Product.objects.create(category=category, name="Pack noir/blanc", slug="pack-noir-blanc", price_xof=3000)
+
+    def test_catalog_page_fills_versioned_caches_from_primary(self):
+        reads = []
+
+        def db_for_read(router, model, **hints):
+            # Réplica en retard simulé: on note seulement si la lecture est forcée sur le primaire.
+            reads.append((model._meta.label_lower, routers.pinned()))
+            return DEFAULT_DB_ALIAS
+
+        catalog.invalidate()
+        with mock.patch.object(PrimaryReplicaRouter, "db_for_read", db_for_read):
+            response = self.client.get(reverse("shop:product_list"))
+
+        self.assertEqual(response.status_code, 200)
+        # Catégories (navigation) et comptes des facettes: jamais lus sur le réplica pour le cache.
+        self.assertIn(("shop.category", True), reads)
+        self.assertNotIn(("shop.category", False), reads)
+        self.assertIn(("shop.product", True), reads)
+        # Les lignes de la page, elles, restent sur le réplica.
+        self.assertIn(("shop.product", False), reads)
+
+    def test_invalidate_schedules_bump_after_replica_lag(self):
+        cache.delete(catalog.REPLICA_BUMP_KEY)
+        with mock.patch.object(routers, "has_replica", return_value=True):
+            catalog.invalidate()
+            catalog.invalidate()
+
+        message = OutboxMessage.objects.get(topic=catalog.REPLICA_CAUGHT_UP)
+        version = catalog.get_version()
+        outbox.process(message)
+        self.assertGreater(catalog.get_version(), version)
+
+
+class ConditionalPageTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        category = Category.objects.create(name="Chaussettes", slug="chaussettes")
+        self.product = Product.objects.create(
+            category=category, name="Pack noir/blanc", slug="pack-noir-blanc", price_xof=3000, stock=5
+        )
+
+    def test_unchanged_page_answers_304(self):
+        for url in (reverse("shop:product_list"), reverse("shop:product_detail", args=[self.product.slug])):
+            with self.subTest(url=url):
+                # La première visite pose le cookie CSRF, qui entre dans l'ETag.
+                self.client.get(url)
+                etag = self.client.get(url)["ETag"]
+
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+                self.assertIn("no-cache", response["Cache-Control"])
+
+    def test_cart_and_catalog_changes_change_etag(self):
+        url = reverse("shop:product_list")
+        etag = self.client.get(url)["ETag"]
+
+        self.client.post(reverse("shop:cart_add", args=[self.product.pk]), {"quantity": 1}, follow=True)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        self.product.price_xof = 3500
+        self.product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "3 500 FCFA")
+
+    def test_if_modified_since_alone_never_hides_cart_change(self):
+        response = self.client.get(reverse("shop:product_list"))
+        self.assertFalse(response.has_header("Last-Modified"))
+        # Le message « ajouté au panier » est affiché (et consommé) par la redirection.
+        self.client.post(reverse("shop:cart_add", args=[self.product.pk]), {"quantity": 1}, follow=True)
+
+        response = self.client.get(
+            reverse("shop:product_list"), HTTP_IF_MODIFIED_SINCE="Sat, 01 Jan 2050 00:00:00 GMT"
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+
+class SalesRollupTests(TransactionTestCase):
+    databases = "__all__"
+
+    def test_sold_category_can_be_deleted_once_emptied(self):
+        old = Category.objects.create(name="Chaussettes", slug="chaussettes")
+        new = Category.objects.create(name="Accessoires", slug="accessoires")
+        product = Product.objects.create(category=old, name="Pack", slug="pack", price_xof=3000, stock=5)
+        client = Client()
+        client.post(reverse("shop:cart_add", args=[product.pk]), {"quantity": 2})
+        client.post(reverse("shop:checkout"), CHECKOUT_DATA)
+        self.assertEqual(DailySales.objects.get().category, old)
+
+        product.category = new
+        product.save()
+        old.delete()
+
+        rollup = DailySales.objects.get()
+        self.assertIsNone(rollup.category)
+        self.assertEqual(rollup.units, 2)
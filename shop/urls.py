@@ -1,18 +1,31 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
 
 app_name = "shop"
 
-urlpatterns = [
-    path("", views.home, name="home"),
-    path("boutique/", views.product_list, name="product_list"),
-    path("categorie/<slug:category_slug>/", views.product_list, name="product_list_by_category"),
-    path("produit/<slug:slug>/", views.product_detail, name="product_detail"),
-    path("panier/", views.cart_detail, name="cart_detail"),
-    path("panier/ajouter/<int:product_id>/", views.cart_add, name="cart_add"),
-    path("panier/supprimer/<int:product_id>/", views.cart_remove, name="cart_remove"),
-    path("commande/", views.checkout, name="checkout"),
-    path("commande/<int:order_id>/merci/", views.checkout_success, name="checkout_success"),
-]
+
+def build_urlpatterns(async_views: bool = False) -> list:
+    """Routes de la boutique; ``async_views`` sert les pages catalogue par les vues asynchrones (ASGI)."""
+    if async_views:
+        from . import async_views as catalog_views
+    else:
+        catalog_views = views
+
+    return [
+        path("", catalog_views.home, name="home"),
+        path("boutique/", catalog_views.product_list, name="product_list"),
+        path("categorie/<slug:category_slug>/", catalog_views.product_list, name="product_list_by_category"),
+        path("produit/<slug:slug>/", catalog_views.product_detail, name="product_detail"),
+        path("panier/", views.cart_detail, name="cart_detail"),
+        path("panier/ajouter/<int:product_id>/", views.cart_add, name="cart_add"),
+        path("panier/supprimer/<int:product_id>/", views.cart_remove, name="cart_remove"),
+        path("commande/", views.checkout, name="checkout"),
+        path("commande/<int:order_id>/merci/", views.checkout_success, name="checkout_success"),
+        path("interne/metriques/", views.metrics_view, name="metrics"),
+    ]
+
+
+urlpatterns = build_urlpatterns(getattr(settings, "SHOP_ASYNC_VIEWS", False))
 
@@ -1,22 +1,31 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, replace
+
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.core.paginator import Paginator
-from django.db import transaction
-from django.http import HttpRequest, HttpResponse
+from django.http import Http404, HttpRequest, HttpResponse, QueryDict
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 
-from . import cart
+from . import cart, catalog, db, facets, inventory, metrics, notifications, pagination, reporting, search
+from .conditional import catalog_page
 from .forms import CheckoutForm
-from .models import Category, Order, OrderItem, Product
+from .models import Order, OrderItem, Product
+from .routers import primary
+
 
+PAGE_SIZE = 12
 
+
+@catalog_page
 def home(request: HttpRequest) -> HttpResponse:
     featured_products = (
-        Product.objects.filter(is_active=True).prefetch_related("images").select_related("category")[:8]
+        Product.objects.filter(is_active=True).select_related("category", "primary_image")[:8]
     )
-    categories = Category.objects.filter(is_active=True).order_by("name")[:8]
+    categories = catalog.active_categories()[:8]
     return render(
         request,
         "shop/home.html",
@@ -27,42 +36,119 @@ def home(request: HttpRequest) -> HttpResponse:
     )
 
 
+@dataclass(frozen=True)
+class Listing:
+    """Paramètres de la liste produits lus dans la requête (partagés avec les vues asynchrones)."""
+
+    q: str
+    tri: str
+    after: str | None
+    before: str | None
+    use_cursor: bool
+    filter_query: str
+    selection: facets.Selection
+
+    @classmethod
+    def from_request(cls, request: HttpRequest) -> Listing:
+        q = (request.GET.get("q") or "").strip()
+        tri = request.GET.get("tri") or ("pertinence" if q else "recent")
+        if tri not in pagination.SORTS and not (tri == "pertinence" and q):
+            tri = "recent"
+
+        selection = facets.Selection.from_query(request.GET)
+        filter_query = QueryDict(mutable=True)
+        if q:
+            filter_query["q"] = q
+        for name, value in selection.items():
+            filter_query[name] = value
+        filter_query["tri"] = tri
+
+        after = request.GET.get("after")
+        before = request.GET.get("before")
+        use_cursor = tri in pagination.SORTS and (
+            getattr(settings, "SHOP_CURSOR_PAGINATION", False) or bool(after or before)
+        )
+        return cls(q, tri, after, before, use_cursor, filter_query.urlencode(), selection)
+
+    def base(self, category=None):
+        """Produits de la page et de la recherche, avant les filtres à facettes."""
+        products = Product.objects.filter(is_active=True).select_related("category", "primary_image")
+        if category is not None:
+            products = products.filter(category=category)
+        if self.q:
+            products = search.filter_queryset(products, self.q)
+        return products
+
+    def selection_for(self, category=None) -> facets.Selection:
+        # Sur la page d'une catégorie, ?categorie= ne s'applique pas.
+        return replace(self.selection, categorie="") if category is not None else self.selection
+
+    def products(self, category=None):
+        return self.selection_for(category).apply(self.base(category))
+
+    def _facet_args(self, category, categories) -> tuple:
+        category_ids = [item.pk for item in categories] if category is None else []
+        return self.base(category), self.selection_for(category), category_ids
+
+    def _facets(self, category, categories, counts) -> facets.Facets:
+        return facets.build(
+            counts, self.selection_for(category), categories if category is None else [], self.filter_query
+        )
+
+    def facet_counts(self, category=None) -> facets.Facets:
+        """Comptes des facettes en une requête (en cache par version du catalogue et recherche)."""
+        categories = catalog.active_categories()
+        return self._facets(category, categories, facets.counts(*self._facet_args(category, categories)))
+
+    def cursor_paginator(self, products) -> pagination.CursorPaginator:
+        # Le total affiché vient des facettes (voir cursor_total): pas de COUNT à part.
+        return pagination.CursorPaginator(products, PAGE_SIZE, self.tri)
+
+    def cursor_total(self, facet_counts: facets.Facets) -> int | None:
+        return facet_counts.total if getattr(settings, "SHOP_CURSOR_SHOW_TOTAL", True) else None
+
+    def ordered(self, products):
+        if self.tri == "pertinence":
+            return products.order_by("search_rank", "-created_at")
+        return products.order_by(*pagination.order_by_fields(self.tri))
+
+    def context(self, category, page_obj, facet_counts: facets.Facets) -> dict:
+        return {
+            "category": category,
+            "q": self.q,
+            "tri": self.tri,
+            "page_obj": page_obj,
+            "cursor_pagination": self.use_cursor,
+            "filter_query": self.filter_query,
+            "selection": self.selection_for(category),
+            "facets": facet_counts,
+        }
+
+
+@catalog_page
 def product_list(request: HttpRequest, category_slug: str | None = None) -> HttpResponse:
-    products = Product.objects.filter(is_active=True).select_related("category").prefetch_related("images")
     category = None
     if category_slug:
-        category = get_object_or_404(Category, slug=category_slug, is_active=True)
-        products = products.filter(category=category)
-
-    q = (request.GET.get("q") or "").strip()
-    if q:
-        products = products.filter(name__icontains=q)
-
-    tri = request.GET.get("tri") or "recent"
-    if tri == "prix_asc":
-        products = products.order_by("price_xof", "-created_at")
-    elif tri == "prix_desc":
-        products = products.order_by("-price_xof", "-created_at")
-    elif tri == "nom":
-        products = products.order_by("name")
+        category = catalog.category_by_slug(category_slug)
+        if category is None:
+            raise Http404("Catégorie introuvable.")
+
+    listing = Listing.from_request(request)
+    products = listing.products(category)
+    facet_counts = listing.facet_counts(category)
+    if listing.use_cursor:
+        page_obj = listing.cursor_paginator(products).get_page(after=listing.after, before=listing.before)
+        page_obj.total = listing.cursor_total(facet_counts)
     else:
-        products = products.order_by("-created_at")
+        paginator = Paginator(listing.ordered(products), PAGE_SIZE)
+        # Total filtré déjà compté avec les facettes.
+        paginator.count = facet_counts.total
+        page_obj = paginator.get_page(request.GET.get("page"))
 
-    paginator = Paginator(products, 12)
-    page_obj = paginator.get_page(request.GET.get("page"))
-
-    return render(
-        request,
-        "shop/product_list.html",
-        {
-            "category": category,
-            "q": q,
-            "tri": tri,
-            "page_obj": page_obj,
-        },
-    )
+    return render(request, "shop/product_list.html", listing.context(category, page_obj, facet_counts))
 
 
+@catalog_page
 def product_detail(request: HttpRequest, slug: str) -> HttpResponse:
     product = get_object_or_404(
         Product.objects.filter(is_active=True).prefetch_related("images").select_related("category"),
@@ -83,15 +169,16 @@ def cart_add(request: HttpRequest, product_id: int):
         quantity = 1
 
     quantity = max(1, quantity)
-    if product.stock <= 0:
+    available = inventory.available_stock([product.id], cart.token(request.cart)).get(product.id, 0)
+    if available <= 0:
         messages.error(request, "Produit en rupture de stock.")
         return redirect("shop:product_detail", slug=product.slug)
 
-    if quantity > product.stock:
-        quantity = product.stock
+    if quantity > available:
+        quantity = available
         messages.info(request, "Quantité ajustée selon le stock disponible.")
 
-    cart.add(request.session, product_id=product.id, quantity=quantity)
+    cart.add(request.cart, product_id=product.id, quantity=quantity)
     messages.success(request, "Produit ajouté au panier.")
     return redirect("shop:cart_detail")
 
@@ -100,13 +187,13 @@ def cart_remove(request: HttpRequest, product_id: int):
     if request.method != "POST":
         return redirect("shop:cart_detail")
 
-    cart.remove(request.session, product_id=product_id)
+    cart.remove(request.cart, product_id=product_id)
     messages.info(request, "Produit supprimé du panier.")
     return redirect("shop:cart_detail")
 
 
 def cart_detail(request: HttpRequest) -> HttpResponse:
-    cart_dict = request.session.get(cart.CART_SESSION_KEY, {})
+    cart_dict = request.cart.get(cart.CART_SESSION_KEY, {})
     if not isinstance(cart_dict, dict):
         cart_dict = {}
 
@@ -119,16 +206,19 @@ def cart_detail(request: HttpRequest) -> HttpResponse:
                 product_id = None
 
             if product_id is not None:
-                cart.remove(request.session, product_id=product_id)
+                cart.remove(request.cart, product_id=product_id)
                 messages.info(request, "Produit supprimé du panier.")
                 return redirect("shop:cart_detail")
 
-        for key in list(cart_dict.keys()):
+        product_ids = []
+        for key in cart_dict.keys():
             try:
-                product_id = int(key)
+                product_ids.append(int(key))
             except ValueError:
                 continue
 
+        available = inventory.available_stock(product_ids, cart.token(request.cart))
+        for product_id in product_ids:
             field_name = f"qty_{product_id}"
             if field_name not in request.POST:
                 continue
@@ -138,12 +228,27 @@ def cart_detail(request: HttpRequest) -> HttpResponse:
             except ValueError:
                 quantity = 0
 
-            cart.set_quantity(request.session, product_id=product_id, quantity=quantity)
+            if quantity > available.get(product_id, 0):
+                quantity = available.get(product_id, 0)
+                messages.info(request, "Quantité ajustée selon le stock disponible.")
+
+            cart.set_quantity(request.cart, product_id=product_id, quantity=quantity)
 
         messages.success(request, "Panier mis à jour.")
         return redirect("shop:cart_detail")
 
     lines, total_xof = cart.build_lines(cart_dict)
+    if lines:
+        available = inventory.available_stock(
+            [line.product.id for line in lines], cart.token(request.cart)
+        )
+        for line in lines:
+            if line.quantity > available.get(line.product.id, 0):
+                messages.warning(
+                    request,
+                    f"Plus que {available.get(line.product.id, 0)} “{line.product.name}” disponible(s).",
+                )
+
     return render(
         request,
         "shop/cart_detail.html",
@@ -154,8 +259,10 @@ def cart_detail(request: HttpRequest) -> HttpResponse:
     )
 
 
+# Lignes (hors cache produits), stock restant et réservations lus sur le primaire: jamais de réplica en retard.
+@primary
 def checkout(request: HttpRequest) -> HttpResponse:
-    cart_dict = request.session.get(cart.CART_SESSION_KEY, {})
+    cart_dict = request.cart.get(cart.CART_SESSION_KEY, {})
     if not isinstance(cart_dict, dict) or not cart_dict:
         messages.info(request, "Votre panier est vide.")
         return redirect("shop:product_list")
@@ -163,21 +270,20 @@ def checkout(request: HttpRequest) -> HttpResponse:
     lines, total_xof = cart.build_lines(cart_dict)
     if not lines:
         messages.info(request, "Votre panier est vide.")
-        cart.clear(request.session)
+        cart.clear(request.cart)
         return redirect("shop:product_list")
 
+    cart_token = cart.token(request.cart)
+    quantities = {line.product.id: line.quantity for line in lines}
+
     if request.method == "POST":
         form = CheckoutForm(request.POST)
         if form.is_valid():
-            with transaction.atomic():
-                # Vérification stock
-                for line in lines:
-                    if line.product.stock < line.quantity:
-                        messages.error(
-                            request,
-                            f"Stock insuffisant pour “{line.product.name}”. Ajustez votre panier.",
-                        )
-                        return redirect("shop:cart_detail")
+            def place_order() -> Order:
+                # Vérification et décrément du stock en une seule requête
+                inventory.decrement_stock(quantities, cart_token)
+                # Seul le stock change: ETag des pages et facettes, pas la version du catalogue.
+                catalog.stock_changed()
 
                 order = Order.objects.create(
                     status=Order.Status.PENDING,
@@ -191,9 +297,8 @@ def checkout(request: HttpRequest) -> HttpResponse:
                     total_xof=total_xof,
                 )
 
-                items = []
-                for line in lines:
-                    items.append(
+                items = OrderItem.objects.bulk_create(
+                    [
                         OrderItem(
                             order=order,
                             product=line.product,
@@ -201,18 +306,44 @@ def checkout(request: HttpRequest) -> HttpResponse:
                             quantity=line.quantity,
                             unit_price_xof=line.product.price_xof,
                         )
-                    )
-                    line.product.stock = max(0, line.product.stock - line.quantity)
-                    line.product.save(update_fields=["stock"])
+                        for line in lines
+                    ]
+                )
+                reporting.record_items(order, items)
+                # E-mails et alertes: envoyés par process_outbox, seulement si la commande est validée.
+                notifications.order_placed(order, quantities)
+                inventory.release(cart_token)
+                return order
 
-                OrderItem.objects.bulk_create(items)
+            try:
+                # BEGIN IMMEDIATE (profil SQLite de production): verrou d'écriture pris d'emblée, réessais bornés.
+                order = db.write_transaction(place_order)
+            except inventory.InsufficientStock:
+                short = inventory.unavailable(quantities, cart_token)
+                for product in short:
+                    messages.error(
+                        request,
+                        f"Stock insuffisant pour “{product.name}”. Ajustez votre panier.",
+                    )
+                if not short:
+                    messages.error(request, "Stock insuffisant. Ajustez votre panier.")
+                return redirect("shop:cart_detail")
 
-            cart.clear(request.session)
+            cart.clear(request.cart)
             request.session["last_order_id"] = order.id
             messages.success(request, "Commande créée avec succès.")
             return redirect("shop:checkout_success", order_id=order.id)
     else:
         form = CheckoutForm()
+        # Le stock du panier est réservé le temps de remplir le formulaire.
+        inventory.maybe_sweep()
+        held = inventory.hold(cart_token, quantities)
+        for line in lines:
+            if held.get(line.product.id, 0) < line.quantity:
+                messages.warning(
+                    request,
+                    f"Plus que {held.get(line.product.id, 0)} “{line.product.name}” disponible(s).",
+                )
 
     return render(
         request,
@@ -225,6 +356,7 @@ def checkout(request: HttpRequest) -> HttpResponse:
     )
 
 
+@primary
 def checkout_success(request: HttpRequest, order_id: int) -> HttpResponse:
     last_order_id = request.session.get("last_order_id")
     if last_order_id != order_id:
@@ -232,3 +364,8 @@ def checkout_success(request: HttpRequest, order_id: int) -> HttpResponse:
 
     order = get_object_or_404(Order.objects.prefetch_related("items"), pk=order_id)
     return render(request, "shop/checkout_success.html", {"order": order})
+
+
+@staff_member_required
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    return HttpResponse(metrics.registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")